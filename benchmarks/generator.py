@@ -0,0 +1,140 @@
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from books.models import Author, Genre, Book
+from books.search import index_books
+from checkouts.models import Checkout, CheckoutSettings, FinePayment
+
+PASSWORD = 'benchmark-password'
+# Items per batch checkout or return request
+DESK_BATCH = 10
+WORDS = [
+    'silent', 'river', 'crown', 'shadow', 'garden', 'winter', 'empire', 'glass', 'iron', 'storm',
+    'hidden', 'city', 'ocean', 'forest', 'golden', 'night', 'broken', 'song', 'stone', 'fire',
+]
+GENRES = [
+    'Fantasy', 'Science Fiction', 'Mystery', 'Romance', 'History', 'Biography', 'Poetry',
+    'Horror', 'Travel', 'Philosophy', 'Children', 'Drama', 'Science', 'Art', 'Cooking',
+]
+
+
+@dataclass
+class Library:
+    """
+    Handles on the generated rows the benchmark scenarios need, including
+    pools of rows that write scenarios use up one per request.
+    """
+    admin: User = None
+    staff: User = None
+    reader: User = None
+    settings: CheckoutSettings = None
+    books: list = field(default_factory=list)
+    # Readers without an open checkout, one per checkout request
+    borrowers: list = field(default_factory=list)
+    # Open checkouts without a fine, one per return request
+    returnable: list = field(default_factory=list)
+    # Overdue checkouts with a fine, one per fine payment request
+    overdue: list = field(default_factory=list)
+    # Patrons and open checkouts for the desk batches, DESK_BATCH per request
+    desk_borrowers: list = field(default_factory=list)
+    desk_returnable: list = field(default_factory=list)
+    # Readers to promote, staff to demote and readers to delete
+    promotable: list = field(default_factory=list)
+    demotable: list = field(default_factory=list)
+    removable: list = field(default_factory=list)
+
+
+def words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def make_users(prefix, count, password, **fields):
+    return User.objects.bulk_create(
+        User(username=f'{prefix}{i}', first_name=prefix.title(), last_name=str(i),
+             email=f'{prefix}{i}@example.com', password=password, **fields)
+        for i in range(count)
+    )
+
+
+def generate_library(seed=0, books=1000, users=200, checkouts=2000, pool=50):
+    """
+    Fill the database with a reproducible library: the same seed and sizes
+    always give the same rows. pool is the number of rows set aside for each
+    write scenario, at least as many as the requests it will time.
+    """
+    rng = random.Random(seed)
+    # Hashing is slow, so every generated user shares one hashed password
+    password = make_password(PASSWORD)
+    library = Library()
+    library.admin = User.objects.create(username='bench_admin', email='bench_admin@example.com', password=password,
+                                        is_staff=True, is_superuser=True)
+    library.staff = User.objects.create(username='bench_staff', email='bench_staff@example.com', password=password,
+                                        is_staff=True)
+    library.settings = CheckoutSettings.objects.create(fine_amount=Decimal('2.00'), due_days=14)
+
+    authors = Author.objects.bulk_create(
+        Author(name=f'{words(rng, 2).title()} {i}', biography=words(rng, 30)) for i in range(max(books // 10, 1))
+    )
+    genres = Genre.objects.bulk_create(Genre(name=name) for name in GENRES)
+    quantities = [rng.randint(1, 5) for _ in range(books)]
+    # bulk_create skips the receivers that stock the shelf and index the book
+    Book.objects.bulk_create(
+        Book(title=f'The {words(rng, 3).title()} {i}', author=rng.choice(authors), genre=rng.choice(genres),
+             isbn=str(9780000000000 + i), description=words(rng, 40),
+             publication_date=date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 70)),
+             quantity=quantity, available_copies=quantity, availability=True)
+        for i, quantity in enumerate(quantities)
+    )
+    index_books(Book.objects.all())
+    library.books = list(Book.objects.order_by('id'))
+
+    readers = make_users('reader', users, password)
+    library.reader = readers[0]
+    library.borrowers = make_users('borrower', pool, password)
+    library.desk_borrowers = make_users('desk_borrower', pool * DESK_BATCH, password)
+    library.promotable = make_users('promotable', pool, password)
+    library.demotable = make_users('demotable', pool, password, is_staff=True)
+    library.removable = make_users('removable', pool, password)
+
+    # Closed checkouts and the fines paid on some of them, as history
+    now = datetime.now()
+    history = []
+    for _ in range(checkouts):
+        checkout_datetime = now - timedelta(days=rng.randrange(30, 3650))
+        history.append(Checkout(
+            user=rng.choice(readers), book=rng.choice(library.books), checkout_datetime=checkout_datetime,
+            due_datetime=checkout_datetime + timedelta(days=14),
+            return_datetime=checkout_datetime + timedelta(days=rng.randrange(1, 30)), fine_paid=True,
+        ))
+    history = Checkout.objects.bulk_create(history)
+    FinePayment.objects.bulk_create(
+        FinePayment(paid_by=checkout.user, paid_to=library.staff, amount_paid=Decimal('4.00'), book=checkout.book,
+                    datetime=checkout.return_datetime)
+        for checkout in history if checkout.return_datetime > checkout.due_datetime
+    )
+
+    # Open checkouts for the return and fine payment scenarios, each held by its own reader
+    holders = make_users('holder', pool * 2, password)
+    open_checkouts = []
+    for i, holder in enumerate(holders):
+        overdue = i >= pool
+        checkout_datetime = now - timedelta(days=30 if overdue else 2)
+        open_checkouts.append(Checkout(
+            user=holder, book=library.books[i % len(library.books)], checkout_datetime=checkout_datetime,
+            due_datetime=checkout_datetime + timedelta(days=14),
+            fine_amount=Decimal('32.00') if overdue else 0,
+        ))
+    open_checkouts = Checkout.objects.bulk_create(open_checkouts)
+    library.returnable = open_checkouts[:pool]
+    library.overdue = open_checkouts[pool:]
+
+    desk_holders = make_users('desk_holder', pool * DESK_BATCH, password)
+    library.desk_returnable = Checkout.objects.bulk_create(
+        Checkout(user=holder, book=library.books[i % len(library.books)], checkout_datetime=now,
+                 due_datetime=now + timedelta(days=14))
+        for i, holder in enumerate(desk_holders)
+    )
+    return library
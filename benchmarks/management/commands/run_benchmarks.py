@@ -0,0 +1,84 @@
+import json
+import platform
+from pathlib import Path
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+from benchmarks.generator import generate_library
+from benchmarks.runner import run_benchmarks, compare
+from benchmarks.scenarios import SCENARIOS
+
+BASELINE = Path(__file__).resolve().parents[2] / 'baseline.json'
+# Results are only comparable when every run uses the same in-process cache
+LOCAL_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks'}}
+
+
+class Command(BaseCommand):
+    help = 'Time every endpoint against a generated library in a throwaway test database and compare with a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--books', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--checkouts', type=int, default=2000)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--scenario', action='append', help='Only run the named scenario, may be repeated')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+        parser.add_argument('--baseline', default=str(BASELINE))
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed median slowdown, 0.25 is 25%%')
+        parser.add_argument('--save-baseline', action='store_true', help='Store the results as the new baseline')
+
+    def handle(self, *args, **options):
+        scenarios = [scenario for scenario in SCENARIOS if not options['scenario'] or scenario.name in options['scenario']]
+        if not scenarios:
+            raise CommandError(f"No scenario named {', '.join(options['scenario'])}")
+        if connection.vendor != 'sqlite':
+            self.stderr.write(f'Running on {connection.vendor}, the baseline was recorded on SQLite')
+
+        setup_test_environment()
+        try:
+            # The login limiter is off, scenarios time the endpoints rather than the throttle
+            with override_settings(CACHES=LOCAL_CACHE, LOGIN_RATE_LIMITS=None):
+                old_config = setup_databases(verbosity=0, interactive=False)
+                try:
+                    library = generate_library(options['seed'], options['books'], options['users'], options['checkouts'],
+                                               pool=options['iterations'] + options['warmup'])
+                    results = run_benchmarks(library, scenarios, options['iterations'], options['warmup'])
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        finally:
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'seed': options['seed'], 'books': options['books'], 'users': options['users'],
+                'checkouts': options['checkouts'], 'iterations': options['iterations'],
+                'database': connection.vendor, 'python': platform.python_version(), 'django': django.get_version(),
+            },
+            'scenarios': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n')
+
+        for name, result in results.items():
+            self.stdout.write(f"{name}: median {result['median_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+                              f"{result['queries']} queries, status {result['status']}")
+
+        baseline_path = Path(options['baseline'])
+        if options['save_baseline']:
+            baseline_path.write_text(output + '\n')
+            self.stdout.write(f'Baseline saved to {baseline_path}')
+            return
+        if not baseline_path.exists():
+            return
+        rows = compare(results, json.loads(baseline_path.read_text())['scenarios'], options['tolerance'])
+        regressed = [row for row in rows if row['regressed']]
+        for row in regressed:
+            self.stdout.write(f"REGRESSION {row['name']}: {row['baseline_ms']:.2f} -> {row['median_ms']:.2f} ms "
+                              f"(x{row['ratio']}), {row['baseline_queries']} -> {row['queries']} queries")
+        if regressed:
+            raise CommandError(f'{len(regressed)} of {len(rows)} scenarios regressed against {baseline_path}')
+        self.stdout.write(f'No regressions in {len(rows)} scenarios against {baseline_path}')
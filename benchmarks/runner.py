@@ -0,0 +1,85 @@
+import statistics
+import time
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from checkouts.config import clear_checkout_settings
+
+
+def request_user(library, scenario, i):
+    if scenario.user == 'borrower':
+        return library.borrowers[i]
+    return getattr(library, scenario.user) if scenario.user else None
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_scenario(library, scenario, iterations, warmup=1):
+    client = APIClient()
+    timings, queries, statuses = [], [], {}
+    for i in range(warmup + iterations):
+        args, data = scenario.request(library, i)
+        url = reverse(scenario.url_name, args=args)
+        client.force_authenticate(request_user(library, scenario, i))
+        if scenario.cold:
+            cache.clear()
+        send = getattr(client, scenario.method)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = send(url, data) if scenario.method == 'get' else send(url, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - start
+        if i < warmup:
+            continue
+        timings.append(elapsed * 1000)
+        queries.append(len(captured))
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    return {
+        'url_name': scenario.url_name,
+        'requests': iterations,
+        'status': statuses,
+        'mean_ms': round(statistics.mean(timings), 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'min_ms': round(min(timings), 3),
+        'queries': round(statistics.mean(queries), 2),
+    }
+
+
+def run_benchmarks(library, scenarios, iterations, warmup=1):
+    # Every run starts from an empty cache
+    cache.clear()
+    clear_checkout_settings()
+    return {scenario.name: run_scenario(library, scenario, iterations, warmup) for scenario in scenarios}
+
+
+def compare(results, baseline, tolerance=0.25, min_delta_ms=1.0):
+    """
+    Compare each scenario with the baseline. A scenario regressed when its
+    median latency grew by more than the tolerance (and by more than
+    min_delta_ms, so timer noise on sub-millisecond requests is ignored)
+    or when it runs more queries.
+    """
+    rows = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else 1
+        rows.append({
+            'name': name,
+            'baseline_ms': before['median_ms'],
+            'median_ms': result['median_ms'],
+            'ratio': round(ratio, 2),
+            'baseline_queries': before['queries'],
+            'queries': result['queries'],
+            'regressed': (ratio > 1 + tolerance and result['median_ms'] - before['median_ms'] > min_delta_ms)
+                         or result['queries'] > before['queries'],
+        })
+    return rows
@@ -0,0 +1,132 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+from rest_framework_simplejwt.tokens import RefreshToken
+from .generator import PASSWORD, DESK_BATCH
+
+
+@dataclass
+class Scenario:
+    """
+    One timed request shape. request(library, i) returns the URL arguments
+    and the query parameters or body of the i-th request.
+    """
+    name: str
+    url_name: str
+    method: str = 'get'
+    user: Optional[str] = None
+    request: Callable = lambda library, i: ((), {})
+    # Clear the cache before every request to time the miss path
+    cold: bool = False
+
+
+def new_book(library, i):
+    return (), {
+        'title': f'Benchmark Added Book {i}', 'publication_date': '2020-01-01', 'isbn': f'BENCH-{i}',
+        'description': 'Added by the benchmark.', 'quantity': 2,
+        'author': {'name': 'Benchmark Author', 'biography': ''}, 'genre': {'name': 'Benchmark Genre'},
+    }
+
+
+def bulk_books(library, i):
+    books = [new_book(library, f'{i}-{n}')[1] for n in range(20)]
+    return (), {'books': books}
+
+
+def increase_quantity(library, i):
+    book = library.books[i % len(library.books)]
+    return (), {'title': book.title, 'author': book.author.name, 'quantity': 1}
+
+
+def add_item(library, i):
+    book = library.books[i % len(library.books)]
+    return (), {'book': book.title, 'barcode': f'BENCH-ITEM-{i}'}
+
+
+def checkout(library, i):
+    # Borrow from the end of the catalog, away from the books held by the open checkouts
+    return (), {'book': library.books[-(i + 1)].title}
+
+
+def return_book(library, i):
+    checkout = library.returnable[i]
+    return (), {'username': checkout.user.username, 'book': checkout.book.title}
+
+
+def fine_payment(library, i):
+    checkout = library.overdue[i]
+    return (), {'paid_by': checkout.user.username, 'book': checkout.book.title, 'amount_paid': int(checkout.fine_amount)}
+
+
+def batch_checkout(library, i):
+    borrowers = library.desk_borrowers[i * DESK_BATCH:(i + 1) * DESK_BATCH]
+    # Past the books the single checkout scenario borrows
+    offset = len(library.borrowers) + i * DESK_BATCH
+    books = [library.books[-(offset + n + 1)] for n in range(DESK_BATCH)]
+    return (), {'items': [{'username': user.username, 'book': book.title} for user, book in zip(borrowers, books)]}
+
+
+def batch_return(library, i):
+    checkouts = library.desk_returnable[i * DESK_BATCH:(i + 1) * DESK_BATCH]
+    return (), {'items': [{'username': checkout.user.username, 'book': checkout.book.title} for checkout in checkouts]}
+
+
+def register(library, i):
+    return (), {'username': f'registered{i}', 'first_name': 'New', 'last_name': 'Reader',
+                'email': f'registered{i}@example.com', 'password': 'Benchmark-Pass-42'}
+
+
+def logout(library, i):
+    refresh = RefreshToken.for_user(library.reader)
+    return (), {'refresh_token': str(refresh), 'access': str(refresh.access_token)}
+
+
+SCENARIOS = [
+    # books
+    Scenario('add-book', 'add-book', 'post', 'staff', new_book),
+    Scenario('bulk-add-books', 'bulk-add-books', 'post', 'staff', bulk_books),
+    Scenario('update-book', 'update-book', 'patch', 'staff',
+             lambda library, i: ((library.books[i % len(library.books)].pk,), {'description': f'Revised {i}'})),
+    Scenario('increase-book-quantity', 'increase-book-quantity', 'post', 'staff', increase_quantity),
+    Scenario('add-item', 'add-item', 'post', 'staff', add_item),
+    Scenario('next-paginator', 'next-paginator', request=lambda library, i: ((), {'perpage': 20})),
+    Scenario('previous-paginator', 'previous-paginator', request=lambda library, i: ((), {'perpage': 20})),
+    Scenario('book-v', 'book-v', cold=True),
+    Scenario('book-view', 'book-view'),
+    Scenario('book-view:cold', 'book-view', cold=True),
+    Scenario('cache-book-search', 'cache-book-search', request=lambda library, i: ((), {'q': 'river', 'perpage': 20})),
+    Scenario('cache-book-search:cold', 'cache-book-search', cold=True,
+             request=lambda library, i: ((), {'q': 'river', 'perpage': 20, 'count': 'true'})),
+    Scenario('async-book-view', 'async-book-view'),
+    Scenario('async-cache-book-search', 'async-cache-book-search', request=lambda library, i: ((), {'q': 'river', 'perpage': 20})),
+    Scenario('async-next-paginator', 'async-next-paginator', request=lambda library, i: ((), {'perpage': 20})),
+    Scenario('async-previous-paginator', 'async-previous-paginator', request=lambda library, i: ((), {'perpage': 20})),
+    Scenario('book-autocomplete', 'book-autocomplete', request=lambda library, i: ((), {'q': 'ri'})),
+    Scenario('book-recommendations', 'book-recommendations',
+             request=lambda library, i: ((library.books[i % len(library.books)].pk,), {})),
+    Scenario('book-export', 'book-export'),
+    Scenario('catalog-cache-stats', 'catalog-cache-stats', user='staff'),
+    # checkouts
+    Scenario('add-checkout-settings', 'add-checkout-settings', 'post', 'admin'),
+    Scenario('update-checkout-settings', 'update-checkout-settings', 'patch', 'admin',
+             lambda library, i: ((library.settings.pk,), {'notice': f'Notice {i}'})),
+    Scenario('checkout-notice', 'checkout-notice', user='reader'),
+    Scenario('checkout', 'checkout', 'post', 'borrower', checkout),
+    Scenario('return-book', 'return-book', 'post', 'staff', return_book),
+    Scenario('fine-payment', 'fine-payment', 'post', 'staff', fine_payment),
+    Scenario('batch-checkout', 'batch-checkout', 'post', 'staff', batch_checkout),
+    Scenario('batch-return-book', 'batch-return-book', 'post', 'staff', batch_return),
+    # users
+    Scenario('user-registration', 'user-registration', 'post', request=register),
+    Scenario('user-login', 'user-login', 'post',
+             request=lambda library, i: ((), {'username': library.reader.username, 'password': PASSWORD})),
+    Scenario('user-logout', 'user-logout', 'post', 'reader', logout),
+    Scenario('get-username', 'get-username', user='reader'),
+    Scenario('add-staff', 'add-staff', 'post', 'admin',
+             lambda library, i: ((), {'username': library.promotable[i].username})),
+    Scenario('remove-staff', 'remove-staff', 'delete', 'admin', lambda library, i: ((library.demotable[i].username,), {})),
+    Scenario('staff-count', 'staff-count', user='admin'),
+    Scenario('list-staff-users', 'list-staff-users', user='admin'),
+    Scenario('remove-normal-user', 'remove-normal-user', 'delete', 'staff',
+             lambda library, i: ((library.removable[i].username,), {})),
+    Scenario('list-normal-users', 'list-normal-users', user='staff'),
+]
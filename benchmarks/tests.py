@@ -0,0 +1,36 @@
+from django.db import transaction
+from django.test import TestCase
+from books.models import Book
+from .generator import generate_library
+from .runner import run_benchmarks, compare
+from .scenarios import SCENARIOS
+
+
+class GeneratorTest(TestCase):
+    def test_same_seed_same_library(self):
+        with transaction.atomic():
+            generate_library(seed=7, books=30, users=5, checkouts=20, pool=2)
+            first = list(Book.objects.order_by('id').values_list('title', 'publication_date', 'quantity'))
+            transaction.set_rollback(True)
+        generate_library(seed=7, books=30, users=5, checkouts=20, pool=2)
+        self.assertEqual(list(Book.objects.order_by('id').values_list('title', 'publication_date', 'quantity')), first)
+
+
+class BenchmarkRunTest(TestCase):
+    def test_every_scenario_succeeds(self):
+        library = generate_library(seed=0, books=30, users=5, checkouts=20, pool=2)
+        results = run_benchmarks(library, SCENARIOS, iterations=1, warmup=1)
+        self.assertEqual(set(results), {scenario.name for scenario in SCENARIOS})
+        for name, result in results.items():
+            # Only adding checkout settings a second time is expected to be rejected
+            expected = '400' if name == 'add-checkout-settings' else '2'
+            self.assertTrue(all(code.startswith(expected) for code in result['status']), (name, result['status']))
+
+    def test_compare_flags_regressions(self):
+        baseline = {'fast': {'median_ms': 10, 'queries': 1}, 'slow': {'median_ms': 10, 'queries': 1}}
+        results = {'fast': {'median_ms': 11, 'queries': 1}, 'slow': {'median_ms': 20, 'queries': 1},
+                   'new': {'median_ms': 5, 'queries': 1}}
+        rows = {row['name']: row for row in compare(results, baseline, tolerance=0.25)}
+        self.assertFalse(rows['fast']['regressed'])
+        self.assertTrue(rows['slow']['regressed'])
+        self.assertNotIn('new', rows)
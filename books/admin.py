@@ -1,11 +1,12 @@
 # books/admin.py
 from django.contrib import admin
-from .models import Book, Author, Genre
+from .models import Book, Author, Genre, Item
 
 # Register the Book, Author, and Genre models in the Django admin
 admin.site.register(Book)
 admin.site.register(Author)
 admin.site.register(Genre)
+admin.site.register(Item)
 
 
 # Create a custom admin class for the Book model
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class BooksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'books'
+
+    def ready(self):
+        from django.db.models import CharField
+        from django.db.models.functions import Lower
+        # Allows field__lower lookups that match the functional LOWER() indexes
+        CharField.register_lookup(Lower)
@@ -0,0 +1,69 @@
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from .models import Book
+from .serializers import BookSerializer, BookSearchSerializer
+from .search import CatalogSearch
+from .pagination import apaginate, aapproximate_count, parse_ordering, parse_perpage
+from .caching import acached_page
+
+# Async versions of the read-only catalog endpoints. Under an ASGI server
+# they wait on the database and the cache without holding a worker thread.
+# Serializers only read rows that were already loaded with select_related,
+# so serializing never touches the database.
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    return JsonResponse(data, status=status_code, safe=False)
+
+
+async def book_view(request):
+    async def page_data():
+        # Retrieve all books from the database
+        books = [book async for book in Book.objects.for_search()]
+        return BookSearchSerializer(books, many=True).data
+
+    # Cached as rendered JSON until the catalog changes
+    return await acached_page(request, 'all_books', page_data)
+
+
+async def cache_book_search(request):
+    search = CatalogSearch(request.GET)
+
+    async def page_data():
+        books = search.books()
+        field, descending = search.ordering
+        books_page, next_cursor, previous_cursor = await apaginate(books, field, descending, search.perpage, search.cursor)
+        total = await aapproximate_count(books, search.count_key) if search.with_count else None
+        return search.response_data(BookSerializer(books_page, many=True).data, next_cursor, previous_cursor, total)
+
+    # Cached as rendered JSON until the catalog changes
+    try:
+        return await acached_page(request, search.cache_key, page_data)
+    except ValidationError as error:
+        return json_response(error.detail, status.HTTP_400_BAD_REQUEST)
+
+
+async def paginate_books(request, from_end):
+    cursor = request.GET.get('cursor')
+    perpage = parse_perpage(request.GET.get('perpage'), default=3)
+    field, descending = parse_ordering(request.GET.get('order_by', 'id'), default='id')
+    try:
+        books, next_cursor, previous_cursor = await apaginate(Book.objects.for_search(), field, descending, perpage, cursor, from_end=from_end)
+    except ValidationError as error:
+        return json_response(error.detail, status.HTTP_400_BAD_REQUEST)
+    return json_response({
+        "data": BookSearchSerializer(books, many=True).data,
+        "next": next_cursor,
+        "previous": previous_cursor,
+    })
+
+
+async def next_paginator(request):
+    # Start from the first page when no cursor is given
+    return await paginate_books(request, from_end=False)
+
+
+async def previous_paginator(request):
+    # Start from the last page when no cursor is given
+    return await paginate_books(request, from_end=True)
@@ -0,0 +1,204 @@
+import bisect
+import re
+import threading
+import time
+import unicodedata
+from django.core.cache import cache
+from .models import Author, Book
+
+# Typeahead suggestions come from a sorted list of (key, kind, id) entries
+# held in memory by every worker. A title or author name is entered once for
+# each word it contains, keyed from that word to the end, so "pot" finds
+# "Harry Potter" as well as "Pottery". A prefix lookup is a binary search
+# followed by a short forward scan, without touching the database.
+
+MAX_SUGGESTIONS = 20
+# Every change to a title or author name is logged in the cache under the
+# next version number, and each worker replays the changes it has not seen.
+# A worker only rebuilds from the database when the log has a gap.
+VERSION_KEY = 'autocomplete_version'
+CHANGE_KEY = 'autocomplete_change_{}'
+# Logged instead of a change when rows were written without signals
+REBUILD = 'rebuild'
+# Changes are kept long enough for every worker to replay them, a worker
+# further behind than MAX_REPLAY changes rebuilds instead
+CHANGE_TIMEOUT = 300
+MAX_REPLAY = 1000
+# How often a worker checks the shared version, in seconds
+CHECK_INTERVAL = 1.0
+NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def normalise(text):
+    # Lower case, without accents, words separated by single spaces
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return NON_WORD_RE.sub(' ', text.lower()).strip()
+
+
+def entry_keys(text):
+    words = normalise(text).split(' ')
+    return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = []
+        # (kind, id) -> (label, keys), to drop an entry's keys when it changes
+        self.labels = {}
+        self.version = None
+        self.checked = 0.0
+        # Only one thread of a worker refreshes the index, the others keep answering from it
+        self.refreshing = threading.Lock()
+        # A version found missing from the log on the last check
+        self.gap = None
+
+    def build(self, version):
+        entries, labels = [], {}
+        sources = [
+            ('book', Book.objects.values_list('id', 'title')),
+            ('author', Author.objects.values_list('id', 'name')),
+        ]
+        for kind, rows in sources:
+            for pk, label in rows.iterator(chunk_size=2000):
+                keys = entry_keys(label)
+                labels[(kind, pk)] = (label, keys)
+                entries.extend((key, kind, pk) for key in keys)
+        entries.sort()
+        with self.lock:
+            self.entries, self.labels, self.version = entries, labels, version
+        self.gap = None
+
+    def remove(self, kind, pk):
+        label, keys = self.labels.pop((kind, pk), (None, ()))
+        for key in keys:
+            i = bisect.bisect_left(self.entries, (key, kind, pk))
+            if i < len(self.entries) and self.entries[i] == (key, kind, pk):
+                del self.entries[i]
+
+    def update(self, kind, pk, label):
+        with self.lock:
+            self.remove(kind, pk)
+            if label is None:
+                return
+            keys = entry_keys(label)
+            self.labels[(kind, pk)] = (label, keys)
+            for key in keys:
+                bisect.insort(self.entries, (key, kind, pk))
+
+    def lookup(self, prefix, limit):
+        prefix = normalise(prefix)
+        if not prefix:
+            return []
+        suggestions, seen = [], set()
+        with self.lock:
+            i = bisect.bisect_left(self.entries, (prefix,))
+            while i < len(self.entries) and len(suggestions) < limit:
+                key, kind, pk = self.entries[i]
+                if not key.startswith(prefix):
+                    break
+                if (kind, pk) not in seen:
+                    seen.add((kind, pk))
+                    suggestions.append({'type': kind, 'id': pk, 'label': self.labels[(kind, pk)][0]})
+                i += 1
+        return suggestions
+
+
+index = PrefixIndex()
+
+
+def shared_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 0, None)
+        version = cache.get(VERSION_KEY, 0)
+    return version
+
+
+def replay(target):
+    # Apply the logged changes up to target, False when the index has to be rebuilt instead
+    start = index.version + 1
+    if target - start >= MAX_REPLAY:
+        return False
+    versions = range(start, target + 1)
+    changes = cache.get_many([CHANGE_KEY.format(version) for version in versions])
+    for version in versions:
+        change = changes.get(CHANGE_KEY.format(version))
+        if change is None:
+            # A change is logged just after its version is bumped, so a gap
+            # only means it was lost when it is still there on the next check
+            if version == index.gap:
+                return False
+            index.gap = version
+            return True
+        if change == REBUILD:
+            return False
+        index.update(*change)
+        index.version = version
+    index.gap = None
+    return True
+
+
+def refresh():
+    version = shared_version()
+    if version == index.version:
+        return
+    # A version behind the index means the cache was cleared
+    if index.version is None or version < index.version or not replay(version):
+        index.build(version)
+
+
+def current_index():
+    now = time.monotonic()
+    if index.version is None:
+        # Built on first use, the other threads wait for it
+        with index.refreshing:
+            if index.version is None:
+                index.checked = now
+                refresh()
+    elif now - index.checked > CHECK_INTERVAL and index.refreshing.acquire(blocking=False):
+        try:
+            index.checked = now
+            refresh()
+        finally:
+            index.refreshing.release()
+    return index
+
+
+def suggest(prefix, limit=10):
+    return current_index().lookup(prefix, min(max(limit, 1), MAX_SUGGESTIONS))
+
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+        return 1
+
+
+def log_change(change):
+    cache.set(CHANGE_KEY.format(bump_version()), change, CHANGE_TIMEOUT)
+
+
+def entry_changed(kind, pk, label):
+    # Called after commit, so a rolled back save never reaches the index
+    log_change((kind, pk, label))
+    # Apply it here right away, the other workers replay it on their next check
+    if index.version is not None and index.refreshing.acquire(blocking=False):
+        try:
+            refresh()
+        finally:
+            index.refreshing.release()
+
+
+def catalog_changed():
+    # Rows written without signals (bulk_create) are picked up by a rebuild
+    log_change(REBUILD)
+
+
+def reset():
+    with index.lock:
+        index.entries, index.labels, index.version = [], {}, None
+    index.gap = None
@@ -0,0 +1,227 @@
+import asyncio
+import gzip
+import hashlib
+import re
+import time
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+from profiling.stats import record
+
+# Catalog entries live under a version number that is bumped whenever a book,
+# author, genre or stock row changes, so stale entries are never read again
+# and can safely be kept for a long time.
+CATALOG_VERSION_KEY = 'catalog_version'
+CATALOG_TIMEOUT = 60 * 60 * 24
+STATS_KEY = 'catalog_stats_{}'
+STATS_EVENTS = ['hits', 'misses', 'stale', 'invalidations']
+# How long one worker may hold the rebuild lock of an entry, and how often
+# the workers waiting on it check for the new entry
+LOCK_TIMEOUT = 30
+LOCK_POLL = 0.05
+# Cache events reported to the profiling middleware for the current request
+PROFILED_EVENTS = {'hits': 'cache_hits', 'stale': 'cache_hits', 'misses': 'cache_misses'}
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+
+def count(event):
+    if event in PROFILED_EVENTS:
+        record(PROFILED_EVENTS[event])
+    key = STATS_KEY.format(event)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add and incr
+        cache.set(key, 1, None)
+
+
+def new_version():
+    # Seeded from the clock so a version key lost to eviction never reuses an old namespace
+    return int(time.time() * 1000)
+
+
+async def acount(event):
+    if event in PROFILED_EVENTS:
+        record(PROFILED_EVENTS[event])
+    key = STATS_KEY.format(event)
+    await cache.aadd(key, 0, None)
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, None)
+
+
+def catalog_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        version = new_version()
+        if not cache.add(CATALOG_VERSION_KEY, version, None):
+            version = cache.get(CATALOG_VERSION_KEY, version)
+    return version
+
+
+async def acatalog_version():
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        version = new_version()
+        if not await cache.aadd(CATALOG_VERSION_KEY, version, None):
+            version = await cache.aget(CATALOG_VERSION_KEY, version)
+    return version
+
+
+def versioned_key(version, name):
+    return f'catalog_{version}_{name}'
+
+
+def catalog_key(name):
+    return versioned_key(catalog_version(), name)
+
+
+def get_catalog(name):
+    value = cache.get(catalog_key(name))
+    count('misses' if value is None else 'hits')
+    return value
+
+
+def set_catalog(name, value, timeout=CATALOG_TIMEOUT):
+    cache.set(catalog_key(name), value, timeout)
+
+
+# Async variants for the ASGI catalog views, using the cache's async API
+
+async def aget_catalog(name):
+    value = await cache.aget(versioned_key(await acatalog_version(), name))
+    await acount('misses' if value is None else 'hits')
+    return value
+
+
+async def aset_catalog(name, value, timeout=CATALOG_TIMEOUT):
+    await cache.aset(versioned_key(await acatalog_version(), name), value, timeout)
+
+
+# Single flight rebuilds: when an entry is missing, one worker takes its lock
+# and rebuilds it while the others serve the entry built for an earlier
+# catalog version (stale while revalidate), or wait for the new one when
+# there is none, so an invalidation never sends every request to the database.
+
+def latest_key(name):
+    # The catalog version the entry was last built for
+    return f'catalog_latest_{name}'
+
+
+def lock_key(version, name):
+    return f'catalog_lock_{version}_{name}'
+
+
+def get_or_build(name, build, timeout=CATALOG_TIMEOUT):
+    version = catalog_version()
+    key = versioned_key(version, name)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        value = cache.get(key)
+        if value is not None:
+            count('hits')
+            return value
+        if cache.add(lock_key(version, name), 1, LOCK_TIMEOUT):
+            break
+        latest = cache.get(latest_key(name))
+        stale = cache.get(versioned_key(latest, name)) if latest is not None else None
+        if stale is not None:
+            count('stale')
+            return stale
+        if time.monotonic() > deadline:
+            # The worker holding the lock is stuck, rebuild the entry here as well
+            break
+        time.sleep(LOCK_POLL)
+
+    count('misses')
+    try:
+        value = build()
+        cache.set(key, value, timeout)
+        cache.set(latest_key(name), version, timeout)
+    finally:
+        cache.delete(lock_key(version, name))
+    return value
+
+
+async def aget_or_build(name, build, timeout=CATALOG_TIMEOUT):
+    version = await acatalog_version()
+    key = versioned_key(version, name)
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        value = await cache.aget(key)
+        if value is not None:
+            await acount('hits')
+            return value
+        if await cache.aadd(lock_key(version, name), 1, LOCK_TIMEOUT):
+            break
+        latest = await cache.aget(latest_key(name))
+        stale = await cache.aget(versioned_key(latest, name)) if latest is not None else None
+        if stale is not None:
+            await acount('stale')
+            return stale
+        if time.monotonic() > deadline:
+            break
+        await asyncio.sleep(LOCK_POLL)
+
+    await acount('misses')
+    try:
+        value = await build()
+        await cache.aset(key, value, timeout)
+        await cache.aset(latest_key(name), version, timeout)
+    finally:
+        await cache.adelete(lock_key(version, name))
+    return value
+
+
+def invalidate_catalog():
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # No version stored yet, start a fresh namespace
+        cache.set(CATALOG_VERSION_KEY, new_version(), None)
+    count('invalidations')
+
+
+def catalog_cache_stats():
+    stats = {event: cache.get(STATS_KEY.format(event), 0) for event in STATS_EVENTS}
+    stats['version'] = catalog_version()
+    return stats
+
+
+# Catalog pages are cached as the gzipped JSON bytes sent to clients, along
+# with their ETag, so a hit neither unpickles the page data nor renders it again.
+
+def render_page(data):
+    body = JSONRenderer().render(data)
+    return {'body': gzip.compress(body), 'etag': '"%s"' % hashlib.md5(body).hexdigest()}
+
+
+def page_response(request, page):
+    gzipped = bool(ACCEPTS_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+    # The compressed body gets a weak ETag, as GZipMiddleware would give it
+    etag = f'W/{page["etag"]}' if gzipped else page['etag']
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(page['body'] if gzipped else gzip.decompress(page['body']), content_type='application/json')
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def cached_page(request, name, build):
+    # build() returns the page data, it is only called by the worker rebuilding the page
+    page = get_or_build(name, lambda: render_page(build()))
+    return page_response(request, page)
+
+
+async def acached_page(request, name, build):
+    async def build_page():
+        return render_page(await build())
+
+    page = await aget_or_build(name, build_page)
+    return page_response(request, page)
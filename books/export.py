@@ -0,0 +1,37 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Book
+
+# Columns written for every book in a catalog export
+EXPORT_FIELDS = [
+    'id', 'title', 'isbn', 'description', 'publication_date', 'quantity',
+    'author__name', 'genre__name', 'updated_at',
+]
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    # File-like object handing back whatever csv.writer writes to it
+    def write(self, value):
+        return value
+
+
+def export_rows(since=None, chunk_size=CHUNK_SIZE):
+    books = Book.objects.order_by('updated_at', 'id')
+    if since is not None:
+        books = books.filter(updated_at__gt=since)
+    # iterator() keeps only one chunk of rows in memory at a time
+    return books.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
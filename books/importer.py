@@ -0,0 +1,141 @@
+from itertools import islice
+from django.db import transaction
+from rest_framework import serializers
+from .models import Author, Genre, Book, BookSearchTerm
+from .serializers import BookSerializer
+from .search import build_terms
+from .caching import invalidate_catalog
+from .autocomplete import catalog_changed
+
+BATCH_SIZE = 1000
+
+
+def chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def csv_row_to_book(row):
+    # Flatten CSV columns into the nested shape AddBookAPI accepts
+    return {
+        'title': row.get('title'),
+        'publication_date': row.get('publication_date'),
+        'isbn': row.get('isbn', ''),
+        'description': row.get('description', ''),
+        'author': {'name': row.get('author'), 'biography': row.get('biography', '')},
+        'genre': {'name': row.get('genre')},
+        'quantity': row.get('quantity'),
+    }
+
+
+class BookImporter:
+    """
+    Loads books in batches: authors and genres are deduplicated in memory,
+    books and their search terms go in with bulk_create, and rows that
+    fail validation are reported by their position in the feed.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self.authors = {}
+        self.genres = {}
+        self.seen = set()
+        self.created = 0
+        self.errors = []
+        # One serializer validates every row, its fields are only built once
+        self.serializer = BookSerializer()
+        # ISBN uniqueness is checked once per batch in drop_existing rather than once per row
+        self.serializer.fields['isbn'].validators = []
+        self.isbns = set()
+
+    def validate(self, chunk, offset):
+        valid = []
+        for position, row in enumerate(chunk, start=offset):
+            try:
+                data = self.serializer.run_validation(row)
+            except serializers.ValidationError as error:
+                self.errors.append({'row': position, 'errors': error.detail})
+                continue
+            key = (data['title'], data['author']['name'])
+            if key in self.seen:
+                self.errors.append({'row': position, 'errors': {'title': ['The book already exists']}})
+                continue
+            if data['isbn'] and data['isbn'] in self.isbns:
+                self.errors.append({'row': position, 'errors': {'isbn': ['book with this isbn already exists.']}})
+                continue
+            self.seen.add(key)
+            self.isbns.add(data['isbn'])
+            valid.append((position, data))
+        return valid
+
+    def drop_existing(self, valid):
+        # Two queries per batch for books and ISBNs already in the library
+        existing = set(
+            Book.objects.filter(title__in={data['title'] for _, data in valid})
+            .values_list('title', 'author__name')
+        )
+        existing_isbns = set(
+            Book.objects.filter(isbn__in={data['isbn'] for _, data in valid if data['isbn']})
+            .values_list('isbn', flat=True)
+        )
+        kept = []
+        for position, data in valid:
+            if (data['title'], data['author']['name']) in existing:
+                self.errors.append({'row': position, 'errors': {'title': ['The book already exists']}})
+            elif data['isbn'] in existing_isbns:
+                self.errors.append({'row': position, 'errors': {'isbn': ['book with this isbn already exists.']}})
+            else:
+                kept.append(data)
+        return kept
+
+    def resolve(self, model, known, values):
+        # Map names to instances, creating the missing ones in a single insert
+        missing = {name: data for name, data in values.items() if name not in known}
+        if missing:
+            for instance in model.objects.filter(name__in=list(missing)):
+                known.setdefault(instance.name, instance)
+            new = [model(**data) for name, data in missing.items() if name not in known]
+            for instance in model.objects.bulk_create(new, batch_size=self.batch_size):
+                known[instance.name] = instance
+
+    def load(self, books_data):
+        self.resolve(Author, self.authors, {data['author']['name']: data['author'] for data in books_data})
+        self.resolve(Genre, self.genres, {data['genre']['name']: data['genre'] for data in books_data})
+
+        # bulk_create skips the pre_save and post_save receivers, so the
+        # shelf stock and search terms are filled in here
+        books = [
+            Book(author=self.authors[data['author']['name']], genre=self.genres[data['genre']['name']],
+                 available_copies=data['quantity'], availability=data['quantity'] > 0,
+                 **{key: value for key, value in data.items() if key not in ('author', 'genre')})
+            for data in books_data
+        ]
+        books = Book.objects.bulk_create(books, batch_size=self.batch_size)
+        BookSearchTerm.objects.bulk_create(
+            [term for book in books for term in build_terms(book)],
+            batch_size=self.batch_size,
+        )
+        self.created += len(books)
+
+    @transaction.atomic
+    def run(self, rows):
+        offset = 0
+        for chunk in chunks(rows, self.batch_size):
+            valid = self.validate(chunk, offset)
+            offset += len(chunk)
+            books_data = self.drop_existing(valid) if valid else []
+            if books_data:
+                self.load(books_data)
+        if self.created:
+            invalidate_catalog()
+            transaction.on_commit(catalog_changed)
+        self.errors.sort(key=lambda error: error['row'])
+        return {'created': self.created, 'errors': self.errors}
+
+
+def import_books(rows, batch_size=BATCH_SIZE):
+    return BookImporter(batch_size).run(rows)
@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, ExpressionWrapper, F, OuterRef, Q, Subquery, When
+from django.utils import timezone
+from .models import Book, Item
+from .caching import invalidate_catalog
+
+
+# Stock changes are single conditional UPDATE statements on Book, so the
+# database decides which of several concurrent checkouts gets the last copy
+# and no row is ever read, changed in Python and written back.
+#
+# availability is worked out from available_copies as it was before the
+# update. SQLite and PostgreSQL evaluate every SET expression against the old
+# row, but MySQL and MariaDB assign left to right, each expression seeing the
+# columns already set. Django keeps the order of the update() arguments, so
+# availability is always set before available_copies and reads the old value
+# on every backend.
+
+def stock_changed():
+    # update() bypasses post_save, so the catalog cache is invalidated here
+    transaction.on_commit(invalidate_catalog)
+
+
+def take_copy(book):
+    # UPDATE ... SET available_copies = available_copies - 1 WHERE id = %s AND available_copies > 0
+    taken = Book.objects.filter(pk=book.pk, available_copies__gt=0).update(
+        availability=ExpressionWrapper(Q(available_copies__gt=1), output_field=BooleanField()),
+        available_copies=F('available_copies') - 1,
+        updated_at=timezone.now(),
+    )
+    if taken:
+        stock_changed()
+    return bool(taken)
+
+
+def return_copy(book):
+    returned = Book.objects.filter(pk=book.pk).update(
+        available_copies=F('available_copies') + 1,
+        availability=True,
+        updated_at=timezone.now(),
+    )
+    if returned:
+        stock_changed()
+    return bool(returned)
+
+
+def add_copies(book, count):
+    # New copies are both held by the library and on the shelf. Copies can
+    # only be withdrawn from the shelf, never from those on loan or on hold:
+    # UPDATE ... WHERE id = %s AND available_copies >= -count
+    books = Book.objects.filter(pk=book.pk)
+    if count < 0:
+        books = books.filter(available_copies__gte=-count)
+    added = books.update(
+        availability=ExpressionWrapper(Q(available_copies__gt=-count), output_field=BooleanField()),
+        quantity=F('quantity') + count,
+        available_copies=F('available_copies') + count,
+        updated_at=timezone.now(),
+    )
+    if added:
+        stock_changed()
+    return bool(added)
+
+
+def count_item(book):
+    # Barcoding the copies already counted in quantity changes nothing, only
+    # an item past them is a new copy: UPDATE ... WHERE quantity < (item count)
+    items = Item.objects.filter(book=OuterRef('pk')).values('book').annotate(total=Count('id')).values('total')
+    added = Book.objects.filter(pk=book.pk, quantity__lt=Subquery(items)).update(
+        quantity=F('quantity') + 1,
+        available_copies=F('available_copies') + 1,
+        availability=True,
+        updated_at=timezone.now(),
+    )
+    if added:
+        stock_changed()
+    return bool(added)
+
+
+def withdraw_copy(book, on_loan=False):
+    # A copy out on loan was not on the shelf, so only the holdings go down
+    changes = {'quantity': F('quantity') - 1, 'updated_at': timezone.now()}
+    if not on_loan:
+        changes['availability'] = ExpressionWrapper(Q(available_copies__gt=1), output_field=BooleanField())
+        changes['available_copies'] = F('available_copies') - 1
+    withdrawn = Book.objects.filter(pk=book.pk).update(**changes)
+    if withdrawn:
+        stock_changed()
+    return bool(withdrawn)
+
+
+def adjust_copies(changes):
+    """
+    Apply {book id: change in copies on the shelf} to several books with a
+    single CASE update. Callers hold the book rows (select_for_update) and
+    have checked that no count goes below zero.
+    """
+    changes = {pk: change for pk, change in changes.items() if change}
+    if not changes:
+        return 0
+    adjusted = Book.objects.filter(pk__in=changes).update(
+        availability=Case(
+            *[When(pk=pk, then=ExpressionWrapper(Q(available_copies__gt=-change), output_field=BooleanField()))
+              for pk, change in changes.items()],
+            output_field=BooleanField(),
+        ),
+        available_copies=Case(*[When(pk=pk, then=F('available_copies') + change) for pk, change in changes.items()]),
+        updated_at=timezone.now(),
+    )
+    if adjusted:
+        stock_changed()
+    return adjusted
@@ -0,0 +1,47 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from books.importer import import_books
+from books.serializers import BookSerializer
+
+
+def sample_rows(number, prefix):
+    for i in range(number):
+        yield {
+            'title': f'{prefix} Book {i}',
+            'publication_date': '2020-01-01',
+            'isbn': f'978{i:010d}',
+            'description': 'Benchmark book',
+            'author': {'name': f'{prefix} Author {i % 500}', 'biography': ''},
+            'genre': {'name': f'{prefix} Genre {i % 20}'},
+            'quantity': 3,
+        }
+
+
+class Command(BaseCommand):
+    help = 'Compare books/sec of the bulk importer with one add-book save per row (rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=5000)
+        parser.add_argument('--single-books', type=int, default=500)
+
+    def timed(self, load):
+        start = time.perf_counter()
+        with transaction.atomic():
+            load()
+            transaction.set_rollback(True)
+        return time.perf_counter() - start
+
+    def single(self, number):
+        for row in sample_rows(number, 'Single'):
+            serializer = BookSerializer(data=row)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+
+    def handle(self, *args, **options):
+        single_books = options['single_books']
+        bulk_books = options['books']
+        single = self.timed(lambda: self.single(single_books))
+        bulk = self.timed(lambda: import_books(sample_rows(bulk_books, 'Bulk')))
+        self.stdout.write(f'single: {single_books / single:.0f} books/sec ({single_books} books)')
+        self.stdout.write(f'bulk:   {bulk_books / bulk:.0f} books/sec ({bulk_books} books)')
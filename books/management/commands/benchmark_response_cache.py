@@ -0,0 +1,63 @@
+import datetime
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from books.models import Author, Genre, Book
+from books.serializers import BookSearchSerializer
+from books.caching import get_catalog, set_catalog, cached_page
+
+
+class Command(BaseCommand):
+    help = 'Compare cache hit latency of cached page data and cached rendered JSON for the book view'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def timed(self, hit, repeat):
+        hit()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            hit()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def handle(self, *args, **options):
+        # The sample books are rolled back once timed
+        with transaction.atomic():
+            self.run(options['books'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def run(self, total, repeat):
+        author = Author.objects.create(name='Benchmark Author')
+        genre = Genre.objects.create(name='Benchmark Genre')
+        Book.objects.bulk_create(
+            Book(title=f'Benchmark Book {i}', author=author, genre=genre, quantity=1, available_copies=1,
+                 description='A benchmark book. ' * 10, publication_date=datetime.date(2000, 1, 1))
+            for i in range(total)
+        )
+        cache.clear()
+        data = BookSearchSerializer(Book.objects.for_search(), many=True).data
+        set_catalog('benchmark_data', data)
+        renderer = JSONRenderer()
+
+        def data_hit():
+            # The previous path: unpickle the page data and render it again
+            return renderer.render(get_catalog('benchmark_data'))
+
+        request = RequestFactory().get('/api/books/book-view/')
+        gzip_request = RequestFactory().get('/api/books/book-view/', HTTP_ACCEPT_ENCODING='gzip')
+        revalidate_request = RequestFactory().get('/api/books/book-view/')
+        cached_page(request, 'benchmark_page', lambda: data)
+        revalidate_request.META['HTTP_IF_NONE_MATCH'] = cached_page(request, 'benchmark_page', lambda: data)['ETag']
+
+        self.stdout.write(f'{Book.objects.count()} books, mean of {repeat} cache hits')
+        for label, hit in [
+            ('data + render', data_hit),
+            ('rendered json', lambda: cached_page(request, 'benchmark_page', lambda: data)),
+            ('rendered gzip', lambda: cached_page(gzip_request, 'benchmark_page', lambda: data)),
+            ('304', lambda: cached_page(revalidate_request, 'benchmark_page', lambda: data)),
+        ]:
+            self.stdout.write(f'{label}: {self.timed(hit, repeat):.3f} ms')
@@ -0,0 +1,38 @@
+import time
+from django.core.management.base import BaseCommand
+from books.models import Book
+from books.search import search_books
+
+
+def orm_search(query):
+    # The icontains path the catalog search endpoints used before the index
+    return Book.objects.filter(title__icontains=query) | \
+           Book.objects.filter(author__name__icontains=query) | \
+           Book.objects.filter(genre__name__icontains=query)
+
+
+class Command(BaseCommand):
+    help = 'Compare catalog search latency of the ORM icontains path and the search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument('queries', nargs='*', default=['the', 'harry', 'fantasy', 'silverwing'])
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--perpage', type=int, default=20)
+
+    def timed(self, queryset, repeat, perpage):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset[:perpage])
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        perpage = options['perpage']
+        self.stdout.write(f'{Book.objects.count()} books, best of {repeat} runs, first {perpage} results')
+        for query in options['queries']:
+            orm_ms = self.timed(orm_search(query).order_by('id'), repeat, perpage)
+            index_ms = self.timed(search_books(query), repeat, perpage)
+            self.stdout.write(f'{query!r}: orm {orm_ms:.2f} ms, index {index_ms:.2f} ms')
@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from books.recommendations import compute_recommendations, TOP_N, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the "patrons who borrowed this also borrowed" recommendations from the checkout history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-n', type=int, default=TOP_N, help='Recommendations kept per book')
+        parser.add_argument('--shards', type=int, default=1,
+                            help='Split the books into this many passes over the history to bound memory')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['top_n'] < 1 or options['shards'] < 1:
+            raise CommandError('--top-n and --shards must be at least 1.')
+        start = time.perf_counter()
+        stored = compute_recommendations(options['top_n'], options['shards'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Stored {stored} recommendations in {time.perf_counter() - start:.2f}s.'))
@@ -0,0 +1,29 @@
+import csv
+import json
+from django.core.management.base import BaseCommand, CommandError
+from books.importer import import_books, csv_row_to_book, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Bulk import books from a CSV file or a JSON list shaped like add-book requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        try:
+            with open(path, newline='', encoding='utf-8') as feed:
+                if path.endswith('.json'):
+                    rows = json.load(feed)
+                else:
+                    # CSV rows are streamed straight into the importer
+                    rows = (csv_row_to_book(row) for row in csv.DictReader(feed))
+                report = import_books(rows, batch_size=options['batch_size'])
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Could not read {path}: {error}')
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Imported {report['created']} books, {len(report['errors'])} rows rejected."))
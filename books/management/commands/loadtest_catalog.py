@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import urlopen
+from django.core.management.base import BaseCommand
+
+# Each sync endpoint and its async counterpart
+ENDPOINTS = [
+    ('book-view/', 'async/book-view/'),
+    ('cache-book-search/?q=the&perpage=10', 'async/cache-book-search/?q=the&perpage=10'),
+    ('next-paginator/?perpage=10', 'async/next-paginator/?perpage=10'),
+    ('previous-paginator/?perpage=10', 'async/previous-paginator/?perpage=10'),
+]
+
+
+def fetch(url):
+    start = time.perf_counter()
+    try:
+        with urlopen(url) as response:
+            response.read()
+            ok = response.status == 200
+    except URLError:
+        ok = False
+    return ok, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = 'Load test the sync and async catalog endpoints of a running server and compare throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000/api/books/')
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--requests', type=int, default=500)
+
+    def run(self, url, concurrency, total):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(fetch, [url] * total))
+        elapsed = time.perf_counter() - start
+        latencies = sorted(latency for _, latency in results)
+        failures = sum(1 for ok, _ in results if not ok)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        return total / elapsed, p95, failures
+
+    def handle(self, *args, **options):
+        base_url = options['base_url'].rstrip('/') + '/'
+        concurrency = options['concurrency']
+        total = options['requests']
+        self.stdout.write(f'{total} requests per endpoint, {concurrency} concurrent clients against {base_url}')
+        for sync_path, async_path in ENDPOINTS:
+            for label, path in (('sync', sync_path), ('async', async_path)):
+                rate, p95, failures = self.run(base_url + path, concurrency, total)
+                self.stdout.write(f'{label:5} {path}: {rate:.1f} req/s, p95 {p95:.1f} ms, {failures} failed')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from books.models import Book
+from books.search import index_books
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the catalog search index for every book'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        index_books(Book.objects.all(), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Book.objects.count()} books.'))
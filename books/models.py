@@ -1,16 +1,43 @@
 import datetime
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import models, transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
+from django.db.models.functions import Lower
 
 # Create your models here.
 class Author(models.Model):
     name = models.CharField(max_length=255)
     biography = models.TextField(blank=True)
 
+    class Meta:
+        indexes = [
+            # Backs case-insensitive lookups written as name__lower=Lower(Value(...))
+            models.Index(Lower('name'), name='author_name_lower_idx'),
+        ]
+
 class Genre(models.Model):
     name = models.CharField(max_length=255)
 
+class BookQuerySet(models.QuerySet):
+    # Eager loading matching the fields each catalog serializer reads, so that
+    # a page of books costs a single query instead of one per author and genre
+    def for_search(self):
+        return self.select_related('author', 'genre').only(
+            'title', 'description', 'publication_date', 'isbn', 'available_copies',
+            'author__name', 'author__biography', 'genre__name',
+        )
+
+    def for_detail(self):
+        return self.select_related('author', 'genre').only(
+            'title', 'description', 'publication_date', 'isbn', 'quantity',
+            'author__name', 'author__biography', 'genre__name',
+        )
+
+    def by_title(self, title):
+        # Case-insensitive title match that can use the LOWER(title) index, unlike iexact
+        return self.filter(title__lower=Lower(models.Value(title)))
+
+
 class Book(models.Model):
     title = models.CharField(max_length=255)
     author = models.ForeignKey(Author, on_delete=models.SET_NULL, null=True)
@@ -20,20 +47,140 @@ class Book(models.Model):
     #publication_date = models.DateField()
     publication_date = models.DateField(default=datetime.date.today)  # Example of setting a default value
     availability = models.BooleanField(default=True)
-    quantity = models.IntegerField(default=1)  # Example of setting a default value
+    quantity = models.IntegerField(default=1)  # Copies the library holds
+    # Copies on the shelf right now, the single stock figure checkouts and listings read
+    available_copies = models.IntegerField(default=0, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookQuerySet.as_manager()
+
+    class Meta:
+        # Keyset pagination walks these (order_by column, id) pairs
+        indexes = [
+            models.Index(fields=['publication_date', 'id']),
+            models.Index(fields=['title', 'id']),
+            models.Index(fields=['isbn', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+            models.Index(Lower('title'), name='book_title_lower_idx'),
+        ]
+        constraints = [
+            # Books added without an ISBN are stored with an empty one
+            models.UniqueConstraint(fields=['isbn'], condition=~models.Q(isbn=''), name='book_isbn_unique'),
+        ]
     
-class BookQuantity(models.Model):
-    book = models.ForeignKey(Book, on_delete=models.SET_NULL, null=True)
-    author = models.ForeignKey(Author, on_delete=models.SET_NULL, null=True)
-    quantity = models.IntegerField()
+# Signal receiver function to put every copy of a new book on the shelf
+@receiver(pre_save, sender=Book)
+def set_available_copies(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance.available_copies = instance.quantity
+        instance.availability = instance.quantity > 0
 
-# Signal receiver function to create BookQuantity entry after saving a Book
-@receiver(post_save, sender=Book)
-def create_book_quantity(sender, instance, created, **kwargs):
+
+class Item(models.Model):
+    # A physical copy of a book, identified at the desk by the barcode on its label
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='items')
+    barcode = models.CharField(max_length=64, unique=True)
+    added = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.barcode
+
+
+# Book.quantity and available_copies count a book's items, kept in step as
+# copies are added and withdrawn. bulk_create skips these receivers, the
+# reconcile_stock command recounts the books afterwards.
+@receiver(post_save, sender=Item)
+def add_item_copy(sender, instance, created, **kwargs):
     if created:
-        # Get the quantity value from the instance (assuming it's a field on the Book model)
-        quantity = instance.quantity  # Adjust this according to your actual field name
-        
-        # Create a new BookQuantity entry with the correct quantity
-        BookQuantity.objects.create(book=instance, author=instance.author, quantity=quantity)
+        from .inventory import count_item
+        count_item(instance.book)
+
+
+@receiver(pre_delete, sender=Item)
+def withdraw_item_copy(sender, instance, **kwargs):
+    from .inventory import withdraw_copy
+    withdraw_copy(instance.book, on_loan=instance.checkouts.filter(return_datetime__isnull=True).exists())
+
+
+class BookSearchTerm(models.Model):
+    # One row per (book, field, term) in the catalog's inverted trigram index
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='search_terms')
+    field = models.CharField(max_length=16)
+    term = models.CharField(max_length=3)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'field']),
+        ]
+
+
+class BookRecommendation(models.Model):
+    # Top co-borrowed books of each book, rebuilt by the compute_recommendations command
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='+')
+    # Patrons who borrowed both books
+    score = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Also the index a book's recommendations are read through, in rank order
+            models.UniqueConstraint(fields=['book', 'rank'], name='book_recommendation_rank_unique'),
+        ]
+
+
+# Signal receivers keeping the search index in step with the catalog
+@receiver(post_save, sender=Book)
+def index_book_terms(sender, instance, **kwargs):
+    from .search import index_book
+    index_book(instance)
+
+
+@receiver(post_save, sender=Author)
+def index_author_books(sender, instance, created, **kwargs):
+    if not created:
+        from .search import index_books
+        index_books(instance.book_set.all())
+
+
+@receiver(post_save, sender=Genre)
+def index_genre_books(sender, instance, created, **kwargs):
+    if not created:
+        from .search import index_books
+        index_books(instance.book_set.all())
+
+
+# Keep the typeahead index in step with titles and author names, once the change is committed
+def autocomplete_changed(kind, pk, label):
+    from .autocomplete import entry_changed
+    transaction.on_commit(lambda: entry_changed(kind, pk, label))
+
+
+@receiver(post_save, sender=Book)
+def autocomplete_book_saved(sender, instance, **kwargs):
+    autocomplete_changed('book', instance.pk, instance.title)
+
+
+@receiver(post_save, sender=Author)
+def autocomplete_author_saved(sender, instance, **kwargs):
+    autocomplete_changed('author', instance.pk, instance.name)
+
+
+@receiver(post_delete, sender=Book)
+def autocomplete_book_deleted(sender, instance, **kwargs):
+    autocomplete_changed('book', instance.pk, None)
+
+
+@receiver(post_delete, sender=Author)
+def autocomplete_author_deleted(sender, instance, **kwargs):
+    autocomplete_changed('author', instance.pk, None)
+
 
+# Any change to the catalog starts a new catalog cache namespace
+@receiver([post_save, post_delete], sender=Book)
+@receiver([post_save, post_delete], sender=Author)
+@receiver([post_save, post_delete], sender=Genre)
+def invalidate_catalog_cache(sender, **kwargs):
+    from .caching import invalidate_catalog
+    invalidate_catalog()
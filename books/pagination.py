@@ -0,0 +1,128 @@
+import base64
+import hashlib
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from .caching import get_catalog, set_catalog, aget_catalog, aset_catalog
+
+# Columns books can be ordered by, each backed by a (column, id) index
+ORDERING_FIELDS = ['id', 'title', 'publication_date', 'isbn']
+MAX_PERPAGE = 100
+COUNT_TIMEOUT = 300
+
+
+def parse_ordering(order_by, default='publication_date', extra_fields=()):
+    # Return (field, descending) for a whitelisted order_by value
+    descending = order_by.startswith('-')
+    field = order_by.lstrip('-')
+    if field not in ORDERING_FIELDS and field not in extra_fields:
+        return parse_ordering(default)
+    return field, descending
+
+
+def parse_perpage(perpage, default=5):
+    try:
+        perpage = int(perpage)
+    except (TypeError, ValueError):
+        return default
+    return min(max(perpage, 1), MAX_PERPAGE)
+
+
+def encode_cursor(item, field, direction):
+    payload = {'v': getattr(item, field), 'id': item.id, 'd': direction}
+    data = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(data).decode()
+
+
+def decode_cursor(cursor, model, field):
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value, pk, direction = payload['v'], int(payload['id']), payload['d']
+        if direction not in ('n', 'p'):
+            raise ValueError(direction)
+        try:
+            value = model._meta.get_field(field).to_python(value)
+        except FieldDoesNotExist:
+            # Annotated values such as the search rank are stored as-is
+            pass
+    except (ValueError, TypeError, KeyError, DjangoValidationError):
+        raise ValidationError({'cursor': 'Invalid cursor.'})
+    return value, pk, direction
+
+
+def after(field, value, pk, descending):
+    # Rows strictly past (value, pk) when ordered by (field, id)
+    op = 'lt' if descending else 'gt'
+    return Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': pk})
+
+
+def page_queryset(queryset, field, descending, perpage, cursor=None, from_end=False):
+    # Build the query for one page; returns it with whether it walks backwards
+    direction = 'p' if from_end else 'n'
+    if cursor:
+        value, pk, direction = decode_cursor(cursor, queryset.model, field)
+
+    # Walk backwards by flipping the ordering and reversing the page afterwards
+    backwards = direction == 'p'
+    walk_descending = descending != backwards
+    prefix = '-' if walk_descending else ''
+    queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}id')
+    if cursor:
+        queryset = queryset.filter(after(field, value, pk, walk_descending))
+    return queryset[:perpage + 1], backwards
+
+
+def page_cursors(items, field, perpage, backwards, cursor):
+    # Trim the extra row fetched to detect more pages and build the cursors
+    has_more = len(items) > perpage
+    items = items[:perpage]
+    if backwards:
+        items.reverse()
+
+    # Coming from a cursor means there are rows on the side we walked away from
+    more_after = bool(cursor) if backwards else has_more
+    more_before = has_more if backwards else bool(cursor)
+
+    next_cursor = previous_cursor = None
+    if items and more_after:
+        next_cursor = encode_cursor(items[-1], field, 'n')
+    if items and more_before:
+        previous_cursor = encode_cursor(items[0], field, 'p')
+    return items, next_cursor, previous_cursor
+
+
+def paginate(queryset, field, descending, perpage, cursor=None, from_end=False):
+    """
+    Keyset pagination over (field, id). Returns the page items together with
+    opaque cursors for the next and previous pages (None at either end).
+    """
+    page, backwards = page_queryset(queryset, field, descending, perpage, cursor, from_end)
+    return page_cursors(list(page), field, perpage, backwards, cursor)
+
+
+async def apaginate(queryset, field, descending, perpage, cursor=None, from_end=False):
+    page, backwards = page_queryset(queryset, field, descending, perpage, cursor, from_end)
+    return page_cursors([item async for item in page], field, perpage, backwards, cursor)
+
+
+def count_key(key):
+    return f'book_count_{hashlib.md5(str(key).encode()).hexdigest()}'
+
+
+def approximate_count(queryset, key):
+    # Totals are cached so that listing pages don't pay for COUNT(*) each time
+    total = get_catalog(count_key(key))
+    if total is None:
+        total = queryset.count()
+        set_catalog(count_key(key), total, COUNT_TIMEOUT)
+    return total
+
+
+async def aapproximate_count(queryset, key):
+    total = await aget_catalog(count_key(key))
+    if total is None:
+        total = await queryset.acount()
+        await aset_catalog(count_key(key), total, COUNT_TIMEOUT)
+    return total
@@ -0,0 +1,67 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import groupby
+from operator import itemgetter
+from django.db import transaction
+from django.db.models.functions import Mod
+from checkouts.models import Checkout
+from .models import BookRecommendation
+
+TOP_N = 10
+BATCH_SIZE = 10000
+# Patrons with more distinct books than this are left out: they add the
+# square of their history in pairs and say little about any one book
+MAX_BASKET = 500
+
+
+def baskets(batch_size=BATCH_SIZE):
+    # Stream the borrowing history in user order, one set of distinct books per patron
+    rows = (
+        Checkout.objects.filter(user__isnull=False, book__isnull=False)
+        .order_by('user_id')
+        .values_list('user_id', 'book_id')
+        .iterator(chunk_size=batch_size)
+    )
+    for _, group in groupby(rows, key=itemgetter(0)):
+        yield {book for _, book in group}
+
+
+def co_borrowed(shard, shards, batch_size=BATCH_SIZE):
+    """
+    Count, for the books of one shard (book id modulo shards), how many
+    patrons also borrowed each other book. Memory is bounded by the books of
+    the shard and their neighbours, not by the size of the history.
+    """
+    counts = defaultdict(Counter)
+    for basket in baskets(batch_size):
+        if len(basket) < 2 or len(basket) > MAX_BASKET:
+            continue
+        for book in basket:
+            if book % shards == shard:
+                counts[book].update(other for other in basket if other != book)
+    return counts
+
+
+def top_neighbours(neighbours, top_n):
+    # Most co-borrowed first, ties broken by book id so reruns give the same ranks
+    return heapq.nsmallest(top_n, neighbours.items(), key=lambda item: (-item[1], item[0]))
+
+
+def compute_recommendations(top_n=TOP_N, shards=1, batch_size=BATCH_SIZE):
+    """
+    Rebuild BookRecommendation from the checkout history, one shard of books
+    at a time, each in its own transaction. Returns the number of rows stored.
+    """
+    stored = 0
+    for shard in range(shards):
+        counts = co_borrowed(shard, shards, batch_size)
+        rows = [
+            BookRecommendation(book_id=book, recommended_id=other, score=score, rank=rank)
+            for book, neighbours in counts.items()
+            for rank, (other, score) in enumerate(top_neighbours(neighbours, top_n), start=1)
+        ]
+        with transaction.atomic():
+            BookRecommendation.objects.alias(shard=Mod('book_id', shards)).filter(shard=shard).delete()
+            BookRecommendation.objects.bulk_create(rows, batch_size=batch_size)
+        stored += len(rows)
+    return stored
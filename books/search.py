@@ -0,0 +1,164 @@
+import re
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from .models import Book, BookSearchTerm
+from .pagination import parse_ordering, parse_perpage
+
+
+# Indexed fields and the weight each one contributes to a book's rank
+FIELD_WEIGHTS = {
+    'title': 4,
+    'author': 3,
+    'genre': 2,
+    'description': 1,
+}
+
+WORD_RE = re.compile(r'\w+')
+
+
+def words(text):
+    return WORD_RE.findall((text or '').lower())
+
+
+def word_terms(word):
+    # Short words are kept whole, longer ones are split into trigrams so that
+    # any substring of three or more characters can be looked up in the index
+    if len(word) < 3:
+        return {word}
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def text_terms(text, prefixes=False):
+    terms = set()
+    for word in words(text):
+        terms |= word_terms(word)
+        if prefixes:
+            # Index one and two letter prefixes so short queries still match
+            terms |= {word[:1], word[:2]}
+    return terms
+
+
+def book_fields(book):
+    return {
+        'title': book.title,
+        'author': book.author.name if book.author else '',
+        'genre': book.genre.name if book.genre else '',
+        'description': book.description,
+    }
+
+
+def build_terms(book):
+    rows = []
+    for field, text in book_fields(book).items():
+        for term in text_terms(text, prefixes=True):
+            rows.append(BookSearchTerm(book=book, field=field, term=term, weight=FIELD_WEIGHTS[field]))
+    return rows
+
+
+@transaction.atomic
+def index_book(book):
+    BookSearchTerm.objects.filter(book=book).delete()
+    BookSearchTerm.objects.bulk_create(build_terms(book))
+
+
+@transaction.atomic
+def index_books(books, batch_size=500):
+    books = books.select_related('author', 'genre')
+    BookSearchTerm.objects.filter(book__in=books.values('id')).delete()
+    rows = []
+    for book in books.iterator(chunk_size=batch_size):
+        rows.extend(build_terms(book))
+        if len(rows) >= batch_size:
+            BookSearchTerm.objects.bulk_create(rows)
+            rows = []
+    BookSearchTerm.objects.bulk_create(rows)
+
+
+def matching_books(text, fields):
+    # Books holding every term of the text in at least one of the given fields
+    terms = text_terms(text)
+    return (
+        BookSearchTerm.objects.filter(term__in=terms, field__in=fields)
+        .values('book')
+        .annotate(hits=Count('term', distinct=True))
+        .filter(hits=len(terms))
+        .values('book')
+    )
+
+
+def search_books(query='', author='', genre='', queryset=None):
+    books = Book.objects.all() if queryset is None else queryset
+
+    # Narrow the catalog through the index for every non-empty filter
+    for text, fields in ((query, list(FIELD_WEIGHTS)), (author, ['author']), (genre, ['genre'])):
+        if text_terms(text):
+            books = books.filter(id__in=matching_books(text, fields))
+
+    # Rank free text matches by the weight of the fields they matched in
+    terms = text_terms(query)
+    if terms:
+        rank = (
+            BookSearchTerm.objects.filter(book=OuterRef('pk'), term__in=terms)
+            .values('book')
+            .annotate(total=Sum('weight'))
+            .values('total')
+        )
+        books = books.annotate(search_rank=Subquery(rank)).order_by('-search_rank', 'id')
+    return books
+
+
+def is_true(value):
+    return (value or '').lower() in ('1', 'true')
+
+
+class CatalogSearch:
+    """
+    The query parameters of a catalog search page, shared by the sync and
+    async search views.
+    """
+
+    def __init__(self, query_params):
+        self.query = query_params.get('q', '')
+        self.author = query_params.get('author', '')
+        self.genre = query_params.get('genre', '')
+        # Search results are ranked by relevance unless an ordering is asked for
+        self.order_by = query_params.get('order_by', '-search_rank' if self.query else 'publication_date')
+        self.perpage = parse_perpage(query_params.get('perpage'), default=5)
+        self.cursor = query_params.get('cursor', '')
+        # Totals cost a COUNT(*), so they are only returned when asked for
+        self.with_count = is_true(query_params.get('count'))
+        # Only list books with a copy on the shelf
+        self.available = is_true(query_params.get('available'))
+
+    @property
+    def cache_key(self):
+        return (f"book_search_{self.query}_{self.author}_{self.genre}_{self.order_by}_"
+                f"{self.perpage}_{self.cursor}_{self.with_count}_{self.available}")
+
+    @property
+    def count_key(self):
+        return (self.query, self.author, self.genre, self.available)
+
+    @property
+    def ordering(self):
+        # (field, descending) the page is keyed on
+        return parse_ordering(self.order_by, extra_fields=['search_rank'] if self.query else ())
+
+    def books(self):
+        books = search_books(self.query, self.author, self.genre, queryset=Book.objects.for_detail())
+        if self.available:
+            books = books.filter(available_copies__gt=0)
+        return books
+
+    def response_data(self, data, next_cursor, previous_cursor, total=None):
+        pagination_metadata = {
+            "perpage": self.perpage,
+            "next": next_cursor,
+            "previous": previous_cursor,
+        }
+        if total is not None:
+            pagination_metadata["total_items"] = total
+        return {
+            "data": data,
+            "pagination": pagination_metadata,
+        }
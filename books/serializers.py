@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import Author, BookQuantity, Genre, Book
+from .models import Author, Genre, Book, Item, BookRecommendation
 from django.db import transaction
+from .inventory import add_copies
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -25,11 +26,6 @@ class GenreSerializer(serializers.ModelSerializer):
         instance.save()
         return instance'''
 
-class BookQuantitySerializer(serializers.ModelSerializer):
-    class Meta:
-        model = BookQuantity
-        fields = '__all__'
-
 class BookSerializer(serializers.ModelSerializer):
     author = AuthorSerializer()
     genre = GenreSerializer()
@@ -92,23 +88,46 @@ class IncreaseBookQuantitySerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Quantity must be a positive integer')
         quantity_increment = validated_data.get('quantity')
         if quantity_increment:
-            instance.quantity += quantity_increment
-            instance.save()
-
-            # Also increment the book quantity in the BookQuantity table
-            book_quantity_instance = BookQuantity.objects.get(book=instance)
-            book_quantity_instance.quantity += quantity_increment
-            book_quantity_instance.save()
+            # Add the copies to the holdings and the shelf in one atomic update
+            add_copies(instance, quantity_increment)
+            instance.refresh_from_db(fields=['quantity', 'available_copies', 'availability'])
         return instance
       
       
+class ItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Item
+        fields = ['id', 'book', 'barcode', 'added']
+        read_only_fields = ['id', 'added']
+
+    def to_internal_value(self, data):
+        # Copies are catalogued against the book title, like checkouts
+        data = data.copy()
+        book = Book.objects.by_title(data.get('book')).first()
+        if book is None:
+            raise serializers.ValidationError({"book": "The library does not have this book."})
+        data['book'] = book.id
+        return super().to_internal_value(data)
+
+
 class UpdateBookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ['title', 'publication_date', 'isbn', 'description', 'quantity']
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        return super().update(instance, validated_data)
+        # Changing the holdings puts the difference on (or takes it off) the shelf as well
+        quantity = validated_data.pop('quantity', None)
+        if quantity is not None and quantity != instance.quantity:
+            if not add_copies(instance, quantity - instance.quantity):
+                raise serializers.ValidationError({'quantity': 'The quantity cannot go below the copies on loan or held for pickup.'})
+            instance.refresh_from_db(fields=['quantity', 'available_copies', 'availability'])
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        # Only write the edited columns so the stock figures are never overwritten with stale values
+        instance.save(update_fields=list(validated_data) + ['updated_at'])
+        return instance
       
 class BookSearchSerializer(serializers.ModelSerializer):
     author_name = serializers.CharField(source='author.name', read_only=True)
@@ -117,54 +136,19 @@ class BookSearchSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Book
-        fields = ['title', 'author_name', 'genre_name', 'description', 'biography','publication_date', 'isbn']
+        fields = ['title', 'author_name', 'genre_name', 'description', 'biography','publication_date', 'isbn', 'available_copies']
         
-        
-from rest_framework import serializers
-from .models import Book, BookQuantity
 
-class IncreaseBookQuantitySerializer2(serializers.ModelSerializer):
-    #author_name = serializers.CharField(source='author.name')
+class BookRecommendationSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='recommended_id', read_only=True)
+    title = serializers.CharField(source='recommended.title', read_only=True)
+    author_name = serializers.CharField(source='recommended.author.name', read_only=True, default=None)
 
     class Meta:
-        model = Book
-        fields = ['title', 'author', 'quantity']
-
-        extra_kwargs = {
-            'title': {'required': True},
-            'author_name': {'required': True},
-            'quantity': {'required': True}
-        }
-
-    def validate(self, data):
-        # Check if the book title and author name match existing book details
-        title = data.get('title')
-        author_name = data.get('author')
-
-        try:
-            book = Book.objects.get(title=title, author__name=author_name)
-            book_quantity = BookQuantity.objects.get(book=book)
-        except (Book.DoesNotExist, BookQuantity.DoesNotExist):
-            raise serializers.ValidationError("This book and the author name do not match existing book details in the library")
-
-        return data
+        model = BookRecommendation
+        fields = ['id', 'title', 'author_name', 'score']
 
-    @transaction.atomic
-    def create(self, instance, validated_data):
-        # Increment the book quantity in the Book table
-        quantity_increment = validated_data.get('quantity')
-        if quantity_increment:
-            instance.quantity += quantity_increment
-            instance.save()
 
-            # Also increment the book quantity in the BookQuantity table
-            book_quantity_instance = BookQuantity.objects.get(book=instance)
-            book_quantity_instance.quantity += quantity_increment
-            book_quantity_instance.save()
-
-        return instance
-
-        
 # Sample JSON data for testing the API
 
 
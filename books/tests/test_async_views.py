@@ -0,0 +1,44 @@
+import datetime
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from books.models import Author, Genre, Book
+
+
+class AsyncCatalogViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = Author.objects.create(name='Author Name')
+        genre = Genre.objects.create(name='Fantasy')
+        for i in range(7):
+            Book.objects.create(title=f'Book {i}', author=author, genre=genre, quantity=1,
+                                publication_date=datetime.date(2020, 1, 1 + i))
+        self.client = APIClient()
+
+    def test_async_endpoints_match_sync(self):
+        for sync_url, async_url, params in [
+            ('/api/books/book-view/', '/api/books/async/book-view/', {}),
+            ('/api/books/cache-book-search/', '/api/books/async/cache-book-search/', {'q': 'book', 'count': 'true'}),
+            ('/api/books/next-paginator/', '/api/books/async/next-paginator/', {'perpage': 3}),
+            ('/api/books/previous-paginator/', '/api/books/async/previous-paginator/', {'perpage': 3}),
+        ]:
+            cache.clear()
+            expected = self.client.get(sync_url, params)
+            cache.clear()
+            response = self.client.get(async_url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json(), expected.json())
+
+    def test_async_paginator_follows_cursors(self):
+        url = '/api/books/async/next-paginator/'
+        first = self.client.get(url, {'perpage': 3}).json()
+        second = self.client.get(url, {'perpage': 3, 'cursor': first['next']}).json()
+        self.assertEqual([book['title'] for book in second['data']], ['Book 3', 'Book 4', 'Book 5'])
+        back = self.client.get(url, {'perpage': 3, 'cursor': second['previous']}).json()
+        self.assertEqual(back['data'], first['data'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/books/async/cache-book-search/', {'cursor': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('cursor', response.json())
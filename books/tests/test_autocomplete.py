@@ -0,0 +1,83 @@
+import time
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from books import autocomplete
+from books.autocomplete import normalise, suggest
+from books.models import Author, Book
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        autocomplete.reset()
+        self.rowling = Author.objects.create(name='J.K. Rowling')
+        self.stone = Book.objects.create(title="Harry Potter and the Philosopher's Stone", author=self.rowling)
+        self.pottery = Book.objects.create(title='Pottery for Beginners')
+        self.emile = Book.objects.create(title='Émile, or On Education')
+
+    def labels(self, prefix, limit=10):
+        return [suggestion['label'] for suggestion in suggest(prefix, limit)]
+
+    def test_normalise(self):
+        self.assertEqual(normalise('  Émile,  or On-Education '), 'emile or on education')
+
+    def test_matches_the_start_of_any_word(self):
+        self.assertEqual(self.labels('pot'), ["Harry Potter and the Philosopher's Stone", 'Pottery for Beginners'])
+        self.assertEqual(self.labels('harry pot'), ["Harry Potter and the Philosopher's Stone"])
+        self.assertEqual(self.labels('row'), ['J.K. Rowling'])
+        self.assertEqual(self.labels('EMI'), ['Émile, or On Education'])
+        self.assertEqual(self.labels('pot', limit=1), ["Harry Potter and the Philosopher's Stone"])
+        self.assertEqual(self.labels(' '), [])
+
+    def test_lookups_do_not_query(self):
+        suggest('warm up')
+        with self.assertNumQueries(0):
+            suggest('pot')
+
+    def test_saves_update_the_index_incrementally(self):
+        suggest('pot')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pottery.title = 'Ceramics for Beginners'
+            self.pottery.save()
+            self.emile.delete()
+            Author.objects.create(name='Beatrix Potter')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.labels('pot'), ['Beatrix Potter', "Harry Potter and the Philosopher's Stone"])
+            self.assertEqual(self.labels('cera'), ['Ceramics for Beginners'])
+            self.assertEqual(self.labels('emile'), [])
+
+    def expire_check(self):
+        autocomplete.index.checked = time.monotonic() - autocomplete.CHECK_INTERVAL - 1
+
+    def test_other_workers_changes_are_replayed(self):
+        suggest('pot')
+        # Logged by another worker, this one replays it without going to the database
+        autocomplete.log_change(('book', self.pottery.pk, 'Ceramics for Beginners'))
+        self.expire_check()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.labels('cera'), ['Ceramics for Beginners'])
+            self.assertEqual(self.labels('pottery'), [])
+
+    def test_gaps_in_the_log_trigger_a_rebuild(self):
+        suggest('pot')
+        Book.objects.filter(pk=self.pottery.pk).update(title='Ceramics for Beginners')
+        autocomplete.catalog_changed()
+        self.expire_check()
+        self.assertEqual(self.labels('cera'), ['Ceramics for Beginners'])
+
+        # A change lost from the log is waited for once, then rebuilt from the database
+        Book.objects.filter(pk=self.pottery.pk).update(title='Glazes for Beginners')
+        autocomplete.bump_version()
+        self.expire_check()
+        self.assertEqual(self.labels('glaz'), [])
+        self.expire_check()
+        self.assertEqual(self.labels('glaz'), ['Glazes for Beginners'])
+
+    def test_endpoint(self):
+        response = APIClient().get('http://127.0.0.1:8000/api/books/autocomplete/', {'q': 'harry', 'limit': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'query': 'harry', 'suggestions': [
+            {'type': 'book', 'id': self.stone.pk, 'label': "Harry Potter and the Philosopher's Stone"},
+        ]})
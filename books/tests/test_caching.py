@@ -0,0 +1,117 @@
+import gzip
+import threading
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+from books.models import Author, Genre, Book
+from books.inventory import add_copies
+from books.caching import catalog_cache_stats, catalog_version, lock_key
+
+
+class CatalogCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Author Name')
+        self.genre = Genre.objects.create(name='Fantasy')
+        Book.objects.create(title='First Book', author=self.author, genre=self.genre)
+        self.client = APIClient()
+
+    def get_titles(self):
+        response = self.client.get('http://127.0.0.1:8000/api/books/book-view/')
+        return [book['title'] for book in response.json()]
+
+    def test_repeat_requests_hit_the_cache(self):
+        self.get_titles()
+        self.get_titles()
+        stats = catalog_cache_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_new_book_is_visible_immediately(self):
+        self.assertEqual(self.get_titles(), ['First Book'])
+        Book.objects.create(title='Second Book', author=self.author, genre=self.genre)
+        self.assertEqual(self.get_titles(), ['First Book', 'Second Book'])
+
+    def test_stock_change_invalidates_catalog(self):
+        before = catalog_cache_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            add_copies(Book.objects.get(title='First Book'), 1)
+        stats = catalog_cache_stats()
+        self.assertNotEqual(stats['version'], before['version'])
+        self.assertEqual(stats['invalidations'], before['invalidations'] + 1)
+
+    def test_cached_page_revalidates_with_etag(self):
+        url = 'http://127.0.0.1:8000/api/books/book-view/'
+        first = self.client.get(url)
+        etag = first['ETag']
+        hit = self.client.get(url)
+        self.assertEqual(hit['ETag'], etag)
+        self.assertEqual(hit.content, first.content)
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        Book.objects.create(title='Second Book', author=self.author, genre=self.genre)
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_cached_page_is_sent_gzipped(self):
+        url = 'http://127.0.0.1:8000/api/books/book-view/'
+        plain = self.client.get(url)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_stale_page_is_served_while_rebuilding(self):
+        self.assertEqual(self.get_titles(), ['First Book'])
+        Book.objects.create(title='Second Book', author=self.author, genre=self.genre)
+        # Another worker is rebuilding the page for the new catalog version
+        cache.add(lock_key(catalog_version(), 'all_books'), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_titles(), ['First Book'])
+        self.assertEqual(catalog_cache_stats()['stale'], 1)
+
+        cache.delete(lock_key(catalog_version(), 'all_books'))
+        self.assertEqual(self.get_titles(), ['First Book', 'Second Book'])
+
+
+class CatalogStampedeTest(TransactionTestCase):
+    workers = 20
+
+    def setUp(self):
+        cache.clear()
+        author = Author.objects.create(name='Author Name')
+        genre = Genre.objects.create(name='Fantasy')
+        for i in range(20):
+            Book.objects.create(title=f'Book {i}', author=author, genre=genre)
+
+    def fetch(self, url, start, queries, statuses):
+        def record(execute, sql, params, many, context):
+            if 'books_book' in sql:
+                queries.append(sql)
+            return execute(sql, params, many, context)
+
+        start.wait()
+        try:
+            with connection.execute_wrapper(record):
+                statuses.append(APIClient().get(url).status_code)
+        finally:
+            connection.close()
+
+    def assert_single_flight(self, url):
+        start = threading.Barrier(self.workers)
+        queries, statuses = [], []
+        threads = [threading.Thread(target=self.fetch, args=(url, start, queries, statuses)) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(statuses, [200] * self.workers)
+        self.assertEqual(len(queries), 1)
+
+    def test_concurrent_misses_query_once(self):
+        self.assert_single_flight('http://127.0.0.1:8000/api/books/book-view/')
+        self.assert_single_flight('http://127.0.0.1:8000/api/books/cache-book-search/?perpage=10')
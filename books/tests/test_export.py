@@ -0,0 +1,46 @@
+import json
+from datetime import timedelta
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from books.models import Author, Genre, Book
+
+
+class BookExportAPITest(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name='Author Name')
+        genre = Genre.objects.create(name='Fantasy')
+        self.old = Book.objects.create(title='Old Book', author=author, genre=genre)
+        self.new = Book.objects.create(title='New Book', author=author, genre=genre)
+        # Push the first book back in time so it falls before the since filter
+        Book.objects.filter(pk=self.old.pk).update(updated_at=self.new.updated_at - timedelta(days=2))
+        self.client = APIClient()
+
+    def export(self, params):
+        response = self.client.get('http://127.0.0.1:8000/api/books/export/', params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_export(self):
+        rows = [json.loads(line) for line in self.export({}).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Old Book', 'New Book'])
+        self.assertEqual(rows[0]['author__name'], 'Author Name')
+
+    def test_csv_export(self):
+        lines = self.export({'type': 'csv'}).splitlines()
+        self.assertTrue(lines[0].startswith('id,title,isbn'))
+        self.assertEqual(len(lines), 3)
+
+    def test_since_filter(self):
+        since = (self.new.updated_at - timedelta(days=1)).isoformat()
+        rows = [json.loads(line) for line in self.export({'since': since}).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['New Book'])
+
+    def test_invalid_since(self):
+        response = self.client.get('http://127.0.0.1:8000/api/books/export/', {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_out_of_range_since(self):
+        for since in ('2024-02-30', '2024-02-28T25:00:00'):
+            response = self.client.get('http://127.0.0.1:8000/api/books/export/', {'since': since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import RefreshToken
+from books.models import Author, Genre, Book
+from books.search import search_books
+
+
+def book_data(title, author='Dan', genre='Fiction', quantity=2, isbn=''):
+    return {
+        'title': title,
+        'publication_date': '2024-04-15',
+        'isbn': isbn or f'isbn-{title}',
+        'description': 'An epic tale',
+        'author': {'name': author, 'biography': 'Good'},
+        'genre': {'name': genre},
+        'quantity': quantity,
+    }
+
+
+class BulkAddBookAPITest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        Book.objects.create(title='Existing Book', author=Author.objects.create(name='Dan'))
+
+    def test_bulk_add_books(self):
+        books = [
+            book_data('First Book'),
+            book_data('Second Book', author='Ann', genre='History', quantity=5),
+            book_data('Third Book'),
+            book_data('Existing Book'),
+            book_data('First Book'),
+            {'title': 'Missing fields'},
+            book_data('Fourth Book', isbn='isbn-Third Book'),
+        ]
+        response = self.client.post('http://127.0.0.1:8000/api/books/bulk-add-books/', data=books, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 3)
+        self.assertEqual([error['row'] for error in response.data['errors']], [3, 4, 5, 6])
+
+        # Authors and genres are shared, not duplicated
+        self.assertEqual(Author.objects.filter(name='Dan').count(), 1)
+        self.assertEqual(Genre.objects.filter(name='Fiction').count(), 1)
+        # Shelf stock and search terms are written even though the save signals do not fire
+        self.assertEqual(Book.objects.get(title='Second Book').available_copies, 5)
+        self.assertEqual(list(search_books('second')), [Book.objects.get(title='Second Book')])
+
+    def test_requires_a_list(self):
+        response = self.client.post('http://127.0.0.1:8000/api/books/bulk-add-books/', data=book_data('Book'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
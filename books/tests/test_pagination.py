@@ -0,0 +1,57 @@
+import datetime
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from books.models import Author, Genre, Book
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name='Author Name')
+        genre = Genre.objects.create(name='Fantasy')
+        # Several books share a publication date so the id tie-breaker is exercised
+        self.books = [
+            Book.objects.create(title=f'Book {i}', author=author, genre=genre,
+                                publication_date=datetime.date(2020, 1, 1 + i // 3))
+            for i in range(7)
+        ]
+        self.client = APIClient()
+
+    def titles(self, response):
+        return [book['title'] for book in response.json()['data']]
+
+    def test_walk_forward_and_back(self):
+        url = 'http://127.0.0.1:8000/api/books/next-paginator/'
+        first = self.client.get(url, {'perpage': 3})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.titles(first), ['Book 0', 'Book 1', 'Book 2'])
+        self.assertIsNone(first.json()['previous'])
+
+        second = self.client.get(url, {'perpage': 3, 'cursor': first.json()['next']})
+        self.assertEqual(self.titles(second), ['Book 3', 'Book 4', 'Book 5'])
+
+        last = self.client.get(url, {'perpage': 3, 'cursor': second.json()['next']})
+        self.assertEqual(self.titles(last), ['Book 6'])
+        self.assertIsNone(last.json()['next'])
+
+        back = self.client.get(url, {'perpage': 3, 'cursor': last.json()['previous']})
+        self.assertEqual(self.titles(back), ['Book 3', 'Book 4', 'Book 5'])
+
+    def test_previous_paginator_starts_from_end(self):
+        response = self.client.get('http://127.0.0.1:8000/api/books/previous-paginator/', {'perpage': 3})
+        self.assertEqual(self.titles(response), ['Book 4', 'Book 5', 'Book 6'])
+        self.assertIsNone(response.json()['next'])
+
+    def test_search_ordered_by_date_with_count(self):
+        url = 'http://127.0.0.1:8000/api/books/cache-book-search/'
+        first = self.client.get(url, {'order_by': '-publication_date', 'perpage': 4, 'count': 'true'})
+        self.assertEqual(self.titles(first), ['Book 6', 'Book 5', 'Book 4', 'Book 3'])
+        self.assertEqual(first.json()['pagination']['total_items'], 7)
+
+        second = self.client.get(url, {'order_by': '-publication_date', 'perpage': 4, 'cursor': first.json()['pagination']['next']})
+        self.assertEqual(self.titles(second), ['Book 2', 'Book 1', 'Book 0'])
+        self.assertNotIn('total_items', second.json()['pagination'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('http://127.0.0.1:8000/api/books/next-paginator/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
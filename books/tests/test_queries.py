@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from books.models import Author, Genre, Book
+
+
+class CatalogQueryCountTest(TestCase):
+    # Number of queries each catalog endpoint may issue for a page of books,
+    # whatever the number of books, authors and genres on that page
+    endpoints = [
+        ('book-view/', {}, 1),
+        ('book-vi/', {}, 1),
+        ('next-paginator/', {'perpage': 20}, 1),
+        ('previous-paginator/', {'perpage': 20}, 1),
+        ('cache-book-search/', {'perpage': 20}, 1),
+        ('cache-book-search/', {'q': 'book', 'perpage': 20}, 1),
+        ('cache-book-search/', {'q': 'book', 'perpage': 20, 'count': 'true'}, 2),
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def add_books(self, number):
+        for i in range(number):
+            author = Author.objects.create(name=f'Author {i}', biography='Bio')
+            genre = Genre.objects.create(name=f'Genre {i}')
+            Book.objects.create(title=f'Book {i}', author=author, genre=genre)
+
+    def count_queries(self, url, params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'http://127.0.0.1:8000/api/books/{url}', params)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_per_endpoint(self):
+        self.add_books(3)
+        for url, params, expected in self.endpoints:
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.count_queries(url, params), expected)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.add_books(2)
+        small = [self.count_queries(url, params) for url, params, _ in self.endpoints]
+        self.add_books(10)
+        large = [self.count_queries(url, params) for url, params, _ in self.endpoints]
+        self.assertEqual(small, large)
@@ -0,0 +1,49 @@
+from io import StringIO
+from datetime import datetime
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework import status
+from books.models import Author, Book, BookRecommendation
+from books.recommendations import compute_recommendations
+from checkouts.models import Checkout
+
+
+class RecommendationsTest(TestCase):
+    def setUp(self):
+        author = Author.objects.create(name='Author Name')
+        self.books = Book.objects.bulk_create([Book(title=f'Book {i}', isbn=f'isbn-{i}', author=author) for i in range(5)])
+        # Patrons and the books they borrowed, book 0 twice by the same patron
+        histories = [[0, 1, 2, 0], [0, 1], [0, 2], [0, 1, 3], [4]]
+        users = User.objects.bulk_create([User(username=f'reader{i}') for i in range(len(histories))])
+        Checkout.objects.bulk_create([
+            Checkout(user=user, book=self.books[book], due_datetime=datetime.now())
+            for user, books in zip(users, histories) for book in books
+        ])
+
+    def neighbours(self, book):
+        return list(BookRecommendation.objects.filter(book=book).order_by('rank').values_list('recommended__title', 'score'))
+
+    def test_co_borrowed_books_are_ranked(self):
+        self.assertEqual(compute_recommendations(top_n=2), 8)
+        self.assertEqual(self.neighbours(self.books[0]), [('Book 1', 3), ('Book 2', 2)])
+        self.assertEqual(self.neighbours(self.books[3]), [('Book 0', 1), ('Book 1', 1)])
+        self.assertEqual(self.neighbours(self.books[4]), [])
+
+    def test_shards_give_the_same_result(self):
+        compute_recommendations(shards=1)
+        single = sorted(BookRecommendation.objects.values_list('book', 'recommended', 'score', 'rank'))
+        call_command('compute_recommendations', shards=3, stdout=StringIO())
+        self.assertEqual(sorted(BookRecommendation.objects.values_list('book', 'recommended', 'score', 'rank')), single)
+
+    def test_endpoint_reads_with_one_query(self):
+        compute_recommendations()
+        client = APIClient()
+        with self.assertNumQueries(1):
+            response = client.get(f'http://127.0.0.1:8000/api/books/{self.books[2].pk}/recommendations/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recommendations'], [
+            {'id': self.books[0].pk, 'title': 'Book 0', 'author_name': 'Author Name', 'score': 2},
+            {'id': self.books[1].pk, 'title': 'Book 1', 'author_name': 'Author Name', 'score': 1},
+        ])
@@ -0,0 +1,54 @@
+import json
+from django.test import TestCase
+from django.core.cache import cache
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+from books.models import Author, Genre, Book, BookSearchTerm
+from books.search import search_books
+from books.views import BookSearchAPI
+
+
+class BookSearchIndexTest(TestCase):
+    def setUp(self):
+        self.rowling = Author.objects.create(name='J.K. Rowling')
+        self.tolkien = Author.objects.create(name='J.R.R. Tolkien')
+        self.fantasy = Genre.objects.create(name='Fantasy')
+        self.history = Genre.objects.create(name='History')
+        self.stone = Book.objects.create(title="Harry Potter and the Philosopher's Stone", author=self.rowling, genre=self.fantasy)
+        self.hobbit = Book.objects.create(title='The Hobbit', author=self.tolkien, genre=self.fantasy, description='A tale about Potter the dwarf')
+        self.rome = Book.objects.create(title='Rome', author=self.tolkien, genre=self.history)
+
+    def test_book_is_indexed_on_save(self):
+        self.assertTrue(BookSearchTerm.objects.filter(book=self.stone, field='title', term='pot').exists())
+
+    def test_search_matches_substrings_across_fields(self):
+        self.assertEqual(set(search_books('tolk')), {self.hobbit, self.rome})
+        self.assertEqual(set(search_books('fanta')), {self.stone, self.hobbit})
+
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(list(search_books('potter')), [self.stone, self.hobbit])
+
+    def test_author_and_genre_filters(self):
+        self.assertEqual(list(search_books(author='tolkien', genre='history')), [self.rome])
+
+    def test_author_rename_reindexes_books(self):
+        self.tolkien.name = 'John Ronald Reuel'
+        self.tolkien.save()
+        self.assertEqual(set(search_books(author='ronald')), {self.hobbit, self.rome})
+        self.assertFalse(search_books(author='tolkien').exists())
+
+    def test_cache_book_search_endpoint(self):
+        client = APIClient()
+        response = client.get('http://127.0.0.1:8000/api/books/cache-book-search/', {'q': 'hobbit'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([book['title'] for book in response.json()['data']], ['The Hobbit'])
+
+    def test_book_search_view_shares_the_search_parameters(self):
+        cache.clear()
+        request = APIRequestFactory().get('/', {'q': 'potter', 'perpage': 1, 'count': 'true'})
+        response = BookSearchAPI.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual([book['title'] for book in data['data']], ["Harry Potter and the Philosopher's Stone"])
+        self.assertEqual(data['total_items'], 2)
+        self.assertIsNotNone(data['next'])
@@ -1,7 +1,10 @@
 from django.urls import path, include
 from .views import AddBookAPI, UpdateBookAPI, IncreaseBookQuantityAPI, BookViewSet
 from .views import NextPaginatorAPI, PreviousPaginatorAPI, CacheBookSearchAPI, cac, BookViewAPI
+from .views import CatalogCacheStatsAPI, BookExportAPI, BulkAddBookAPI, AddItemAPI, AutocompleteAPI
+from .views import BookRecommendationsAPI
 from rest_framework.routers import DefaultRouter
+from . import async_views
 
 
 router = DefaultRouter()
@@ -9,13 +12,23 @@ router = DefaultRouter()
 #path('', include(router.urls)),
 urlpatterns = [
     path('add-book/', AddBookAPI.as_view(), name='add-book'),
+    path('bulk-add-books/', BulkAddBookAPI.as_view(), name='bulk-add-books'),
     path('update-book/<int:pk>/', UpdateBookAPI.as_view(), name='update-book'),
+    path('add-item/', AddItemAPI.as_view(), name='add-item'),
     path('increase-book-quantity/', IncreaseBookQuantityAPI.as_view(), name='increase-book-quantity'),
     path('next-paginator/', NextPaginatorAPI.as_view(), name='next-paginator'),
     path('previous-paginator/', PreviousPaginatorAPI.as_view(), name='previous-paginator'),
     path('book-vi/', cac, name='book-v'),
     path('book-view/', BookViewAPI.as_view(), name='book-view'),
     path('cache-book-search/', CacheBookSearchAPI.as_view(), name='cache-book-search'),
+    path('async/book-view/', async_views.book_view, name='async-book-view'),
+    path('async/cache-book-search/', async_views.cache_book_search, name='async-cache-book-search'),
+    path('async/next-paginator/', async_views.next_paginator, name='async-next-paginator'),
+    path('async/previous-paginator/', async_views.previous_paginator, name='async-previous-paginator'),
+    path('autocomplete/', AutocompleteAPI.as_view(), name='book-autocomplete'),
+    path('<int:pk>/recommendations/', BookRecommendationsAPI.as_view(), name='book-recommendations'),
+    path('export/', BookExportAPI.as_view(), name='book-export'),
+    path('catalog-cache-stats/', CatalogCacheStatsAPI.as_view(), name='catalog-cache-stats'),
     
     
 ]
@@ -1,23 +1,31 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.generics import CreateAPIView, UpdateAPIView
-from .models import Book, Author
+from .models import Book, Author, Item, BookRecommendation
 from .serializers import BookSerializer, UpdateBookSerializer, AuthorSerializer, GenreSerializer
-from .serializers import IncreaseBookQuantitySerializer, BookSearchSerializer
-from rest_framework.permissions import AllowAny, BasePermission
+from .serializers import IncreaseBookQuantitySerializer, BookSearchSerializer, ItemSerializer
+from .serializers import BookRecommendationSerializer
+from .search import search_books, CatalogSearch
+from .pagination import paginate, parse_ordering, parse_perpage, approximate_count
+from .caching import cached_page, catalog_cache_stats
+from rest_framework.permissions import AllowAny
 from rest_framework import viewsets
 from django.core.paginator import Paginator, EmptyPage
 from rest_framework.views import APIView
-from django.core.cache import cache
 from django.views.decorators.cache import cache_page
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import Value
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date, parse_datetime
+from .export import export_rows, ndjson_lines, csv_lines
+from .importer import import_books
+from .autocomplete import suggest
+from users.authentication import ClaimsJWTAuthentication
+from users.permissions import IsAdminOrStaffUser
 
 
-class IsAdminOrStaffUser(BasePermission):
-    def has_permission(self, request, view):
-        return request.user.is_superuser or request.user.is_staff
-    
 class AddBookAPI(CreateAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAdminOrStaffUser]  # Allow unauthenticated access
     queryset = Book.objects.all()
     serializer_class = BookSerializer
@@ -41,7 +49,28 @@ class AddBookAPI(CreateAPIView):
             return super().create(request, *args, **kwargs)
 
 
+class BulkAddBookAPI(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrStaffUser]  # Allow staff access
+    def post(self, request, *args, **kwargs):
+        # Accept either a list of books or {"books": [...]}, each shaped like an AddBookAPI request
+        books = request.data.get('books') if isinstance(request.data, dict) else request.data
+        if not isinstance(books, list):
+            return Response({'message': 'A list of books is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        report = import_books(books)
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+
+class AddItemAPI(CreateAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrStaffUser]  # Allow staff access
+    # Each new copy adds to the book's quantity and shelf stock through the Item post_save receiver
+    queryset = Item.objects.all()
+    serializer_class = ItemSerializer
+
+
 class IncreaseBookQuantityAPI(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAdminOrStaffUser]  # Allow staff access
     def post(self, request, *args, **kwargs):
         title = request.data.get('title')
@@ -53,8 +82,8 @@ class IncreaseBookQuantityAPI(APIView):
 
         
         try:
-            authors = Author.objects.filter(name__iexact=author_name).first()
-            book = Book.objects.get(title__iexact=title)
+            authors = Author.objects.filter(name__lower=Lower(Value(author_name))).first()
+            book = Book.objects.by_title(title).get()
         except (Author.DoesNotExist, Book.DoesNotExist):
             return Response({"error": "This book and the author name do not match existing book details in the library"}, status=status.HTTP_400_BAD_REQUEST)
         
@@ -100,18 +129,16 @@ class UpdateBookAPI(UpdateAPIView):
 #@cache_page(60 * 15)
 class BookViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]  # Allow unauthenticated access
-    queryset = Book.objects.all()
+    queryset = Book.objects.for_search()
     serializer_class = BookSearchSerializer
 
     def get_queryset(self):
         
-        queryset = Book.objects.all()
+        queryset = Book.objects.for_search()
         # Search
         search_query = self.request.query_params.get('search', None)
         if search_query:
-            queryset = queryset.filter(title__icontains=search_query) | \
-                       queryset.filter(author__name__icontains=search_query) | \
-                       queryset.filter(genre__name__icontains=search_query)
+            queryset = search_books(search_query, queryset=queryset)
         # Filtering
         author_filter = self.request.query_params.get('author', None)
         if author_filter:
@@ -132,31 +159,22 @@ class BookViewSet(viewsets.ModelViewSet):
     
 class NextPaginatorAPI(APIView):
     permission_classes = [AllowAny]  # Allow unauthenticated access
-    def get(self, request, *args, **kwargs):
-        page = request.query_params.get('page', default=1)
-        perpage = request.query_params.get('perpage', default=3)
-        queryset = Book.objects.all()
-        paginator = Paginator(queryset, perpage)
-        try:
-            queryset = paginator.page(number=int(page)+1)
-        except EmptyPage:
-            queryset = paginator.page(paginator.num_pages)
-        serializer = BookSearchSerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    from_end = False  # Start from the first page when no cursor is given
 
-class PreviousPaginatorAPI(APIView):
-    permission_classes = [AllowAny]  # Allow unauthenticated access
     def get(self, request, *args, **kwargs):
-        page = request.query_params.get('page', default=1)
-        perpage = request.query_params.get('perpage', default=3)
-        queryset = Book.objects.all()
-        paginator = Paginator(queryset, perpage)
-        try:
-            queryset = paginator.page(number=max(1, int(page)-1))
-        except EmptyPage:
-            queryset = paginator.page(1)
-        serializer = BookSearchSerializer(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        cursor = request.query_params.get('cursor')
+        perpage = parse_perpage(request.query_params.get('perpage'), default=3)
+        field, descending = parse_ordering(request.query_params.get('order_by', 'id'), default='id')
+        books, next_cursor, previous_cursor = paginate(Book.objects.for_search(), field, descending, perpage, cursor, from_end=self.from_end)
+        serializer = BookSearchSerializer(books, many=True)
+        return Response({
+            "data": serializer.data,
+            "next": next_cursor,
+            "previous": previous_cursor,
+        }, status=status.HTTP_200_OK)
+
+class PreviousPaginatorAPI(NextPaginatorAPI):
+    from_end = True  # Start from the last page when no cursor is given
     
     
 class BookSearchAPI(APIView):
@@ -164,61 +182,47 @@ class BookSearchAPI(APIView):
     
     def get(self, request):
         # Get query parameters from the request
-        search_query = request.query_params.get('q', '')  # Search query
-        author_name = request.query_params.get('author', '')  # Author name filter
-        genre_name = request.query_params.get('genre', '')  # Genre name filter
-        order_by = request.query_params.get('order_by', 'publication_date')  # Order by field
-
-         # Check if the data is already cached
-        cache_key = f"book_search_{search_query}_{author_name}_{genre_name}_{order_by}"
-        cached_books = cache.get(cache_key)
-        if cached_books:
-            return Response(cached_books, status=status.HTTP_200_OK)
-        
-        # Filter books based on search query, author name, and genre name
-        books = Book.objects.filter(
-            title__icontains=search_query,
-            author__name__icontains=author_name,
-            genre__name__icontains=genre_name
-        )
+        search = CatalogSearch(request.query_params)
 
-        # Order the books based on the specified field
-        books = books.order_by(order_by)
-        
-        # Pagination 
-        perpage = self.request.query_params.get('perpage', default=5)
-        page = self.request.query_params.get('page', default=1)
-        paginator = Paginator(books, perpage)
-        try:
-            books = paginator.page(number=page)
-        except EmptyPage:
-            books = paginator.page(1)
+        # Cached as rendered JSON until the catalog changes, apart from
+        # CacheBookSearchAPI's pages as the two are shaped differently
+        return cached_page(request, f'book_search_api_{search.cache_key}', lambda: self.page_data(search))
+
+    def page_data(self, search):
+        # Retrieve books from the search index
+        books = search.books()
+
+        # Pagination keyed on the (order_by, id) of the page boundaries
+        field, descending = search.ordering
+        books_page, next_cursor, previous_cursor = paginate(books, field, descending, search.perpage, search.cursor)
             
-        serializer = BookSerializer(books, many=True)
-        # Cache the data for 1 hour (adjust as needed)
-        cache.set(cache_key, serializer.data, 60) 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        serializer = BookSerializer(books_page, many=True)
+        data = {
+            "data": serializer.data,
+            "next": next_cursor,
+            "previous": previous_cursor,
+        }
+        if search.with_count:
+            data["total_items"] = approximate_count(books, search.count_key)
+        return data
 
     
 class BookViewAPI(APIView):
     permission_classes = [AllowAny]  # Allow unauthenticated access
     def get(self, request):
-        cached_books = cache.get('all_books')
-        if cached_books:
-            return Response(cached_books, status=status.HTTP_200_OK)
+        # Cached as rendered JSON until the catalog changes
+        return cached_page(request, 'all_books', self.page_data)
+
+    def page_data(self):
         # Retrieve all books from the database
-        books = Book.objects.all()
+        books = Book.objects.for_search()
         serializer = BookSearchSerializer(books, many=True)
-        cache.set('all_books', serializer.data, 60)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return serializer.data
 
 @cache_page(60)  # Cache for 1 minutes    
 def cac(request):
-    print("gooop")
-    books = Book.objects.all()
+    books = Book.objects.for_search()
     serializer = BookSearchSerializer(books, many=True)
-    print("poolop iuy")
-    print(len(serializer.data))
     return HttpResponse(f'<html><body><p>{serializer.data}</p></body></html>', status=status.HTTP_200_OK)
     #return Response(serializer.data, status=status.HTTP_200_OK)
     
@@ -228,63 +232,84 @@ class CacheBookSearchAPI(APIView):
     permission_classes = [AllowAny]  # Allow unauthenticated access
     def get(self, request):
         # Get query parameters from the request
-        search_query = request.query_params.get('q', '')
-        author_name = request.query_params.get('author', '')
-        genre_name = request.query_params.get('genre', '')
-        order_by = request.query_params.get('order_by', 'publication_date')
-        perpage = int(request.query_params.get('perpage', 5))
-        page = int(request.query_params.get('page', 1))
-
-        # Construct a cache key based on the query parameters
-        cache_key = f"book_search_{search_query}_{author_name}_{genre_name}_{order_by}_{perpage}_{page}"
-
-        # Check if the data is already cached
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data, status=status.HTTP_200_OK)
-
-        # If not cached, retrieve books from the database
-        books = Book.objects.filter(
-            title__icontains=search_query,
-            author__name__icontains=author_name,
-            genre__name__icontains=genre_name
-        )
+        search = CatalogSearch(request.query_params)
+
+        # Cached as rendered JSON until the catalog changes
+        return cached_page(request, search.cache_key, lambda: self.page_data(search))
+
+    def page_data(self, search):
+        # Retrieve books from the search index
+        books = search.books()
+
+        # Get the requested page, keyed on the (order_by, id) of the page boundaries
+        field, descending = search.ordering
+        books_page, next_cursor, previous_cursor = paginate(books, field, descending, search.perpage, search.cursor)
 
-        # Order the books based on the specified field
-        books = books.order_by(order_by)
+        serializer = BookSerializer(books_page, many=True)
 
-        # Create a paginator
-        paginator = Paginator(books, perpage)
+        # Combine data and pagination metadata
+        total = approximate_count(books, search.count_key) if search.with_count else None
+        return search.response_data(serializer.data, next_cursor, previous_cursor, total)
 
-        # Validate page number
-        if page < 1:
-            page = 1
-        elif page > paginator.num_pages:
-            page = paginator.num_pages
 
-        # Get the requested page
+class AutocompleteAPI(APIView):
+    # Called on every keystroke, so it skips token parsing and answers from the in-memory prefix index
+    authentication_classes = []
+    permission_classes = [AllowAny]  # Allow unauthenticated access
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
         try:
-            books_page = paginator.page(number=page)
-        except EmptyPage:
-            books_page = paginator.page(1)
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
+        return Response({'query': query, 'suggestions': suggest(query, limit)}, status=status.HTTP_200_OK)
 
-        serializer = BookSerializer(books_page, many=True)
 
-        # Construct pagination metadata
-        pagination_metadata = {
-            "page": page,
-            "perpage": perpage,
-            "total_pages": paginator.num_pages,
-            "total_items": paginator.count,
-        }
+class BookRecommendationsAPI(APIView):
+    permission_classes = [AllowAny]  # Allow unauthenticated access
+    def get(self, request, pk, *args, **kwargs):
+        # One query through the (book, rank) index, the recommendations are computed offline
+        recommendations = (
+            BookRecommendation.objects.filter(book_id=pk)
+            .select_related('recommended__author')
+            .only('score', 'recommended__title', 'recommended__author__name')
+            .order_by('rank')
+        )
+        serializer = BookRecommendationSerializer(recommendations, many=True)
+        return Response({'book': pk, 'recommendations': serializer.data}, status=status.HTTP_200_OK)
+
+
+class CatalogCacheStatsAPI(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrStaffUser]  # Allow staff access
+    def get(self, request):
+        return Response(catalog_cache_stats(), status=status.HTTP_200_OK)
 
-        # Combine data and pagination metadata
-        response_data = {
-            "data": serializer.data,
-            "pagination": pagination_metadata,
-        }
 
-        # Cache the data for 1 hour (adjust as needed)
-        cache.set(cache_key, response_data, 3600)
 
-        return Response(response_data, status=status.HTTP_200_OK)
+class BookExportAPI(APIView):
+    permission_classes = [AllowAny]  # Allow unauthenticated access
+    def get(self, request):
+        # Output type, ndjson (default) or csv
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in ('ndjson', 'csv'):
+            return Response({"error": "type must be either ndjson or csv"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Only export books changed after this date or datetime, for incremental syncs
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = parse_datetime(since) or parse_date(since)
+            except ValueError:
+                # Well formed but not a real date, such as 2024-02-30
+                since = None
+            if since is None:
+                return Response({"error": "since must be an ISO 8601 date or datetime"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = export_rows(since)
+        if export_type == 'csv':
+            response = StreamingHttpResponse(csv_lines(rows), content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="books.csv"'
+        else:
+            response = StreamingHttpResponse(ndjson_lines(rows), content_type='application/x-ndjson')
+        return response
@@ -0,0 +1,131 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import serializers
+from books.models import Book
+from books.inventory import adjust_copies
+from reservations.models import Reservation
+from reservations.allocation import hand_back_copies
+from .config import get_checkout_settings
+from .models import Checkout
+
+# Batch checkout and return for the circulation desk. Every user and book of
+# a batch is resolved with one IN query, stock and queues change through
+# set-based updates, and the whole batch is one transaction. Items are
+# matched case-insensitively, like the single item endpoints match them.
+
+
+def lower(value):
+    return (value or '').lower()
+
+
+def item_result(item, status, **fields):
+    return {'username': item['username'], 'book': item['book'], 'status': status, **fields}
+
+
+def users_by_name(usernames):
+    return {user.username.lower(): user for user in User.objects.filter(username__lower__in={lower(name) for name in usernames})}
+
+
+def books_by_title(titles):
+    # Rows are locked so that concurrent checkouts wait for this batch's stock changes
+    books = {}
+    for book in (Book.objects.select_for_update().filter(title__lower__in={lower(title) for title in titles})
+                 .only('id', 'title', 'available_copies').order_by('id')):
+        # Like by_title().first(), the oldest book wins when editions share a title
+        books.setdefault(book.title.lower(), book)
+    return books
+
+
+@transaction.atomic
+def checkout_items(items):
+    checkout_settings = get_checkout_settings()
+    if checkout_settings is None:
+        raise serializers.ValidationError("Checkout settings not found.")
+    users = users_by_name(item['username'] for item in items)
+    books = books_by_title(item['book'] for item in items)
+
+    # A patron may only have one book out at a time
+    borrowing = set(
+        Checkout.objects.filter(user__in=list(users.values()), return_datetime__isnull=True).values_list('user_id', flat=True)
+    )
+    held = set(
+        Reservation.objects.filter(user__in=list(users.values()), book__in=list(books.values()), status=Reservation.READY)
+        .values_list('user_id', 'book_id')
+    )
+    on_shelf = {book.pk: book.available_copies for book in books.values()}
+
+    checkout_datetime = datetime.now()
+    due_datetime = checkout_datetime + timedelta(days=checkout_settings.due_days)
+    results, checkouts, fulfilled, taken = [], [], [], Counter()
+    for item in items:
+        user = users.get(lower(item['username']))
+        book = books.get(lower(item['book']))
+        if user is None:
+            results.append(item_result(item, 'error', error="User does not exist."))
+            continue
+        if book is None:
+            results.append(item_result(item, 'error', error="The library does not have this book."))
+            continue
+        if user.pk in borrowing:
+            results.append(item_result(item, 'error', error=f"{user.username} has a book checked out and needs to return it first."))
+            continue
+        # Use a copy held for this user, or take one from the shelf
+        if (user.pk, book.pk) in held:
+            held.discard((user.pk, book.pk))
+            fulfilled.append(Q(user_id=user.pk, book_id=book.pk))
+        elif on_shelf[book.pk] > 0:
+            on_shelf[book.pk] -= 1
+            taken[book.pk] += 1
+        else:
+            results.append(item_result(item, 'error', error="The book is currently unavailable and only available for reservation."))
+            continue
+        borrowing.add(user.pk)
+        checkouts.append(Checkout(user=user, book=book, checkout_datetime=checkout_datetime, due_datetime=due_datetime))
+        results.append(item_result(item, 'checked_out', due_datetime=due_datetime))
+
+    if fulfilled:
+        Reservation.objects.filter(reduce(or_, fulfilled), status=Reservation.READY).update(status=Reservation.FULFILLED)
+    adjust_copies({pk: -count for pk, count in taken.items()})
+    Checkout.objects.bulk_create(checkouts)
+    return results
+
+
+@transaction.atomic
+def return_items(items):
+    # Open checkouts matching any of the users and books, oldest first like resolve_open_checkout
+    open_checkouts = defaultdict(list)
+    for checkout in (
+        Checkout.objects.select_related('user', 'book').select_for_update(of=('self',))
+        .filter(user__username__lower__in={lower(item['username']) for item in items},
+                book__title__lower__in={lower(item['book']) for item in items},
+                return_datetime__isnull=True)
+        .order_by('id')
+    ):
+        open_checkouts[(checkout.user.username.lower(), checkout.book.title.lower())].append(checkout)
+
+    return_datetime = datetime.now()
+    results, closed, returned = [], [], Counter()
+    for item in items:
+        matches = open_checkouts.get((lower(item['username']), lower(item['book'])))
+        if not matches:
+            results.append(item_result(item, 'error', error=f"{item['username']} did not borrow this book."))
+            continue
+        checkout = matches[0]
+        if checkout.fine_amount > 0:
+            results.append(item_result(item, 'error', error=f"A fine of #{checkout.fine_amount} must be paid before this book is returned."))
+            continue
+        matches.pop(0)
+        closed.append(checkout.pk)
+        returned[checkout.book_id] += 1
+        results.append(item_result(item, 'returned', return_datetime=return_datetime))
+
+    if closed:
+        Checkout.objects.filter(pk__in=closed).update(return_datetime=return_datetime, fine_paid=True)
+        # Returned copies go to the patrons waiting for them, the rest back on the shelf
+        hand_back_copies(returned)
+    return results
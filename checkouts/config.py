@@ -0,0 +1,34 @@
+import time
+from django.core.cache import cache
+from .models import CheckoutSettings
+
+# CheckoutSettings is a single row that rarely changes, so it is kept in
+# this process for a few seconds and in the shared cache until it is saved.
+SETTINGS_KEY = 'checkout_settings'
+LOCAL_TIMEOUT = 5
+
+_local = {'settings': None, 'expires': 0.0}
+
+
+def get_checkout_settings():
+    now = time.monotonic()
+    if _local['settings'] is not None and _local['expires'] > now:
+        return _local['settings']
+
+    checkout_settings = cache.get(SETTINGS_KEY)
+    if checkout_settings is None:
+        checkout_settings = CheckoutSettings.objects.first()
+        if checkout_settings is None:
+            return None
+        cache.set(SETTINGS_KEY, checkout_settings, None)
+
+    _local['settings'] = checkout_settings
+    _local['expires'] = now + LOCAL_TIMEOUT
+    return checkout_settings
+
+
+def clear_checkout_settings():
+    # Other processes pick up the change once their local copy expires
+    cache.delete(SETTINGS_KEY)
+    _local['settings'] = None
+    _local['expires'] = 0.0
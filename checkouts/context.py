@@ -0,0 +1,44 @@
+from django.contrib.auth.models import User
+from django.db.models import Value
+from django.db.models.functions import Lower
+from rest_framework.exceptions import NotFound
+from books.models import Book, Item
+from .models import Checkout
+
+
+def resolve_open_checkout(username, book_title):
+    """
+    Find the open checkout of a book by a user with one joined query. The
+    checkout, with its user and book loaded, is handed to the serializers
+    through their context so they don't look the same rows up again.
+    """
+    checkout = (
+        Checkout.objects.select_related('user', 'book')
+        .filter(user__username__iexact=username, book__title__lower=Lower(Value(book_title)), return_datetime__isnull=True)
+        .order_by('id')
+        .first()
+    )
+    if checkout is not None:
+        return checkout
+
+    # Work out which part is missing only when the lookup failed
+    user = User.objects.filter(username__iexact=username).first()
+    if user is None:
+        raise NotFound(detail="User does not exist.", code=404)
+    if not Book.objects.by_title(book_title).exists():
+        raise NotFound(detail="The library does not have this book.", code=404)
+    raise NotFound(detail=f"{user} did not borrow this book.", code=404)
+
+
+def resolve_item_checkout(barcode):
+    # The open checkout of a copy, found through the unique barcode and the open item constraint
+    checkout = (
+        Checkout.objects.select_related('user', 'book', 'item')
+        .filter(item__barcode=barcode, return_datetime__isnull=True)
+        .first()
+    )
+    if checkout is not None:
+        return checkout
+    if not Item.objects.filter(barcode=barcode).exists():
+        raise NotFound(detail="No copy has this barcode.", code=404)
+    raise NotFound(detail="This copy is not checked out.", code=404)
@@ -0,0 +1,57 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, DecimalField, Value, When
+from .config import get_checkout_settings
+from .models import Checkout
+
+BATCH_SIZE = 5000
+
+
+def overdue_fine(due_datetime, now, rate):
+    # CheckoutSettings.fine_amount is charged for every full day past the due date
+    days = (now - due_datetime) // timedelta(days=1)
+    return rate * max(days, 0)
+
+
+def accrue_fines(now=None, batch_size=BATCH_SIZE):
+    """
+    Bring Checkout.fine_amount up to date for every overdue open checkout.
+    Fines only depend on the due date, the time and the daily rate, so runs
+    are idempotent; rows whose fine did not change are not written, and each
+    batch is written with a single UPDATE ... SET fine_amount = CASE ... END.
+    Returns the number of checkouts whose fine changed.
+    """
+    checkout_settings = get_checkout_settings()
+    if checkout_settings is None:
+        return 0
+    rate = checkout_settings.fine_amount
+    now = now or datetime.now()
+
+    overdue = Checkout.objects.filter(return_datetime__isnull=True, due_datetime__lt=now).order_by('id')
+    updated = 0
+    last_id = 0
+    while True:
+        rows = list(overdue.filter(id__gt=last_id).values_list('id', 'due_datetime', 'fine_amount')[:batch_size])
+        if not rows:
+            return updated
+        last_id = rows[-1][0]
+
+        # Group the changed checkouts by their new fine
+        changed = defaultdict(list)
+        for pk, due_datetime, fine_amount in rows:
+            fine = overdue_fine(due_datetime, now, rate)
+            if fine != fine_amount:
+                changed[fine].append(pk)
+        if not changed:
+            continue
+
+        ids = [pk for pks in changed.values() for pk in pks]
+        fine_amount = Case(
+            *[When(id__in=pks, then=Value(fine)) for fine, pks in changed.items()],
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
+        with transaction.atomic():
+            # Guard on return_datetime so a book returned meanwhile keeps its fine
+            updated += Checkout.objects.filter(id__in=ids, return_datetime__isnull=True).update(fine_amount=fine_amount)
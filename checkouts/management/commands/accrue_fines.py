@@ -0,0 +1,26 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from checkouts.fines import accrue_fines, BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Compute overdue fines for open checkouts, once or on a schedule'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Keep running, accruing fines every --interval seconds')
+        parser.add_argument('--interval', type=int, default=3600)
+
+    def run_once(self, batch_size):
+        start = time.perf_counter()
+        updated = accrue_fines(batch_size=batch_size)
+        self.stdout.write(f'Updated {updated} fines in {time.perf_counter() - start:.2f}s')
+
+    def handle(self, *args, **options):
+        self.run_once(options['batch_size'])
+        while options['loop']:
+            time.sleep(options['interval'])
+            # Long running process, don't keep a connection the database has dropped
+            close_old_connections()
+            self.run_once(options['batch_size'])
@@ -0,0 +1,57 @@
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from books.models import Book
+from checkouts.config import clear_checkout_settings
+from checkouts.models import CheckoutSettings
+from checkouts.views import CheckoutAPIView, ReturnBookAPIView, BatchCheckoutAPIView, BatchReturnBookAPIView
+
+
+class Command(BaseCommand):
+    help = 'Compare N single checkout and return requests with one batch request of N items (seeded and rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=20)
+
+    def call(self, view, user, data):
+        request = APIRequestFactory().post('/', data, format='json')
+        force_authenticate(request, user=user)
+        response = view(request)
+        response.render()
+        return response
+
+    def timed(self, label, calls):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for view, user, data in calls:
+                self.call(view, user, data)
+            elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label}: {elapsed * 1000:.1f} ms, {len(queries)} queries')
+
+    def handle(self, *args, **options):
+        number = options['items']
+        with transaction.atomic():
+            if not CheckoutSettings.objects.exists():
+                CheckoutSettings.objects.create()
+            clear_checkout_settings()
+            staff = User.objects.create_user(username='circulation-staff', is_staff=True)
+            # One set of patrons and books for the single requests and one for the batches
+            readers = User.objects.bulk_create(User(username=f'circulation-reader-{i}') for i in range(number * 2))
+            books = Book.objects.bulk_create(
+                Book(title=f'Circulation benchmark {i}', isbn=f'CIRC-{i}', quantity=1, available_copies=1)
+                for i in range(number * 2)
+            )
+            single = [{'username': reader.username, 'book': book.title} for reader, book in zip(readers[:number], books[:number])]
+            batch = [{'username': reader.username, 'book': book.title} for reader, book in zip(readers[number:], books[number:])]
+
+            checkout, batch_checkout = CheckoutAPIView.as_view(), BatchCheckoutAPIView.as_view()
+            self.timed(f'{number} single checkouts', [(checkout, reader, {'book': item['book']}) for reader, item in zip(readers, single)])
+            self.timed(f'batch checkout of {number}', [(batch_checkout, staff, {'items': batch})])
+
+            return_book, batch_return = ReturnBookAPIView.as_view(), BatchReturnBookAPIView.as_view()
+            self.timed(f'{number} single returns', [(return_book, staff, item) for item in single])
+            self.timed(f'batch return of {number}', [(batch_return, staff, {'items': batch})])
+            transaction.set_rollback(True)
@@ -0,0 +1,42 @@
+import time
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from books.models import Book
+from checkouts.fines import accrue_fines, BATCH_SIZE
+from checkouts.models import Checkout, CheckoutSettings
+from checkouts.config import clear_checkout_settings
+
+
+class Command(BaseCommand):
+    help = 'Time fine accrual over N overdue open checkouts (seeded and rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkouts', type=int, default=1000000)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        number = options['checkouts']
+        now = datetime.now()
+        with transaction.atomic():
+            if not CheckoutSettings.objects.exists():
+                CheckoutSettings.objects.create(fine_amount=100)
+            clear_checkout_settings()
+            user = User.objects.create_user(username='fine-benchmark')
+            book = Book.objects.create(title='Fine benchmark')
+
+            start = time.perf_counter()
+            for offset in range(0, number, 10000):
+                Checkout.objects.bulk_create([
+                    Checkout(user=user, book=book, checkout_datetime=now, due_datetime=now - timedelta(days=i % 60, hours=1))
+                    for i in range(offset, min(offset + 10000, number))
+                ], batch_size=2000)
+            self.stdout.write(f'Seeded {number} open checkouts in {time.perf_counter() - start:.1f}s')
+
+            for run in ('first run', 'repeat run'):
+                start = time.perf_counter()
+                updated = accrue_fines(now=now, batch_size=options['batch_size'])
+                self.stdout.write(f'{run}: {updated} fines updated in {time.perf_counter() - start:.2f}s')
+            transaction.set_rollback(True)
+        clear_checkout_settings()
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan
+from books.models import Book, Item
+from books.caching import invalidate_catalog
+from checkouts.models import Checkout
+from reservations.models import Reservation
+
+
+class Command(BaseCommand):
+    help = ('Repair Book.quantity so it equals the items of books that have them, and '
+            'Book.available_copies so it equals the copies held minus the open checkouts and ready holds')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many books have drifted')
+
+    def handle(self, *args, **options):
+        open_checkouts = Coalesce(
+            Subquery(
+                Checkout.objects.filter(book=OuterRef('pk'), return_datetime__isnull=True)
+                .values('book').annotate(total=Count('id')).values('total'),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+        # Copies held for pickup are off the shelf until the patron checks them out
+        ready_holds = Coalesce(
+            Subquery(
+                Reservation.objects.filter(book=OuterRef('pk'), status=Reservation.READY)
+                .values('book').annotate(total=Count('id')).values('total'),
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+        # Books catalogued copy by copy hold as many copies as they have items
+        held = Coalesce(
+            Subquery(
+                Item.objects.filter(book=OuterRef('pk'))
+                .values('book').annotate(total=Count('id')).values('total'),
+                output_field=IntegerField(),
+            ),
+            F('quantity'),
+        )
+        expected = held - open_checkouts - ready_holds
+
+        repaired = 0
+        batch_size = options['batch_size']
+        last_id = 0
+        while True:
+            # Walk the catalog in id order, one set-based UPDATE per batch
+            ids = list(Book.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last_id = ids[-1]
+            drifted = (
+                Book.objects.filter(id__in=ids)
+                .annotate(held=held, expected=expected)
+                .exclude(quantity=F('held'), available_copies=F('expected'), availability=GreaterThan(F('expected'), 0))
+            )
+            if options['dry_run']:
+                repaired += drifted.count()
+                continue
+            with transaction.atomic():
+                repaired += Book.objects.filter(id__in=drifted.values('id')).update(
+                    quantity=held,
+                    available_copies=expected,
+                    availability=GreaterThan(expected, 0),
+                )
+
+        if repaired and not options['dry_run']:
+            invalidate_catalog()
+        verb = 'have drifted' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'{repaired} books {verb}.'))
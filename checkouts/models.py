@@ -1,7 +1,9 @@
 from datetime import datetime
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from users.models import UserProfile
-from books.models import Book
+from books.models import Book, Item
 from django.contrib.auth.models import User
 from django.utils import timezone
 
@@ -9,12 +11,26 @@ from django.utils import timezone
 class Checkout(models.Model):
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     book = models.ForeignKey(Book, on_delete=models.SET_NULL, null=True)
+    # The copy lent out, when it was checked out by barcode
+    item = models.ForeignKey(Item, on_delete=models.SET_NULL, null=True, blank=True, related_name='checkouts')
     checkout_datetime = models.DateTimeField(default=datetime.now())
     return_datetime = models.DateTimeField(blank=True, null=True)
     due_datetime = models.DateTimeField(blank=True)
     fine_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     fine_paid = models.BooleanField(default=False)
     renewal_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Only open checkouts are looked up by user and book, so only they are indexed
+            models.Index(fields=['user', 'book'], condition=models.Q(return_datetime__isnull=True), name='checkout_open_idx'),
+            # Fine accrual walks the open checkouts by due date
+            models.Index(fields=['due_datetime', 'id'], condition=models.Q(return_datetime__isnull=True), name='checkout_open_due_idx'),
+        ]
+        constraints = [
+            # A copy can only be out once at a time, this also indexes the open checkout of each copy
+            models.UniqueConstraint(fields=['item'], condition=models.Q(return_datetime__isnull=True), name='checkout_open_item_unique'),
+        ]
     
 
 class CheckoutSettings(models.Model):
@@ -22,9 +38,19 @@ class CheckoutSettings(models.Model):
     fine_amount = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     notice = models.TextField(default="Please return the book on time to avoid fines.")
     due_days = models.PositiveIntegerField(default=14)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return "Checkout Settings"
+
+
+# Drop the cached settings whenever they are changed, and again on commit, as
+# another request can cache the old row before the change is committed
+@receiver([post_save, post_delete], sender=CheckoutSettings)
+def clear_checkout_settings_cache(sender, **kwargs):
+    from .config import clear_checkout_settings
+    clear_checkout_settings()
+    transaction.on_commit(clear_checkout_settings)
     
     
 class FinePayment(models.Model):
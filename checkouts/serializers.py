@@ -1,13 +1,16 @@
 from rest_framework import serializers
 from .models import CheckoutSettings
+from .config import get_checkout_settings
+from .context import resolve_open_checkout
 # i disable time zone setting by doing USE_TZ = False instead of USE_TZ = True
 from datetime import datetime, timedelta, timezone
 from datetime import datetime, timedelta
-from django.db import transaction
-from books.models import BookQuantity
+from django.db import IntegrityError, transaction
+from books.inventory import take_copy
+from reservations.allocation import hand_back_copy, fulfil_reservation
 from django.contrib.auth.models import User
 from .models import Checkout, FinePayment
-from books.models import Book
+from books.models import Book, Item
 from django.db.models import Q
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
@@ -20,53 +23,62 @@ class CheckoutSettingsSerializer(serializers.ModelSerializer):
 
 
 class CheckoutSerializer(serializers.ModelSerializer):
+    # Scanning a copy's barcode checks out that copy, instead of any copy of the titled book
+    barcode = serializers.CharField(max_length=64, write_only=True, required=False)
+
     class Meta:
         model = Checkout
-        fields = ['user', 'book', 'checkout_datetime', 'due_datetime']
-        read_only_fields = ['user', 'checkout_datetime', 'due_datetime']
+        fields = ['user', 'book', 'item', 'barcode', 'checkout_datetime', 'due_datetime']
+        read_only_fields = ['user', 'item', 'checkout_datetime', 'due_datetime']
         
     def to_internal_value(self, data):
-        data = data.copy()  # create a mutable copy
+        barcode = data.get('barcode')
+        if barcode:
+            # One indexed lookup gives both the copy and its book
+            item = Item.objects.select_related('book').filter(barcode=barcode).first()
+            if item is None:
+                raise serializers.ValidationError({"barcode": "No copy has this barcode."})
+            return {'book': item.book, 'item': item}
+
         book_title = data.get('book')
-        book = Book.objects.filter(title__iexact=book_title).first()
+        book = Book.objects.by_title(book_title).first()
         if book is None:
             raise serializers.ValidationError({"book": "The library does not have this book."})
-        data['book'] = book.id
-        return super().to_internal_value(data)
+        # The book is the only writable field, pass it on instead of loading it again by id
+        return {'book': book}
 
     def create(self, validated_data):
-        book_title = self.context['request'].data.get('book')
-        book = Book.objects.get(title__iexact=book_title)
+        book = validated_data['book']
+        item = validated_data.get('item')
         
-        user_id = self.context['request'].user.id
-        try:
-            user = User.objects.get(id=user_id)
-        except user.DoesNotExist:
-            raise serializers.ValidationError({"user": "User does not exist."})
+        # The authentication already checked the account exists and is active, so the User row isn't loaded
+        # Token claims carry the id as a string
+        user_id = int(self.context['request'].user.id)
         
         # Check if the user has already borrowed a book
-        borrowed_book = Checkout.objects.filter(Q(user=user) & Q(return_datetime__isnull=True)).first()
+        borrowed_book = Checkout.objects.filter(Q(user_id=user_id) & Q(return_datetime__isnull=True)).first()
         if borrowed_book:
             raise serializers.ValidationError(f"You have borrowed a book name '{borrowed_book.book.title}' , and you need to return it. Before you can checkout any other book.")
+        if item is not None and item.checkouts.filter(return_datetime__isnull=True).exists():
+            raise serializers.ValidationError("This copy is already checked out.")
         
-        checkout_settings = CheckoutSettings.objects.first()
+        checkout_settings = get_checkout_settings()
+        if checkout_settings is None:
+            raise serializers.ValidationError("Checkout settings not found.")
         checkout_datetime = datetime.now()
         due_datetime = checkout_datetime + timedelta(days=checkout_settings.due_days)
         
-        with transaction.atomic():
-            # Get the BookQuantity instance for the book
-            book_quantity = BookQuantity.objects.get(book=book)
-
-            # Check if the book is available
-            if book_quantity.quantity > 0:
-                # Decrement the book quantity by 1
-                book_quantity.quantity -= 1
-                book_quantity.save()
-
-                # Create the Checkout instance
-                return Checkout.objects.create(user=user, book=book, checkout_datetime=checkout_datetime, due_datetime=due_datetime)
-            else:
-                raise serializers.ValidationError("The book is currently unavailable and only available for reservation.")
+        try:
+            with transaction.atomic():
+                # Use a copy held for this user, or take one from the shelf with a single conditional decrement
+                if fulfil_reservation(user_id, book) or take_copy(book):
+                    # Create the Checkout instance
+                    return Checkout.objects.create(user_id=user_id, book=book, item=item, checkout_datetime=checkout_datetime, due_datetime=due_datetime)
+                else:
+                    raise serializers.ValidationError("The book is currently unavailable and only available for reservation.")
+        except IntegrityError:
+            # Another desk lent the same copy out first, the copy taken above was rolled back
+            raise serializers.ValidationError("This copy is already checked out.")
 
 
 class ReturnBookSerializer(serializers.ModelSerializer):
@@ -76,6 +88,11 @@ class ReturnBookSerializer(serializers.ModelSerializer):
         read_only_fields = ['return_datetime', 'fine_amount', 'fine_paid']
         
     def to_internal_value(self, data):
+        # The view already resolved the checkout, so reuse its user and book
+        checkout = self.context.get('checkout')
+        if checkout is not None:
+            return {'user': checkout.user, 'book': checkout.book}
+
         # Make a mutable copy of the QueryDict
         data = data.copy()
 
@@ -85,7 +102,7 @@ class ReturnBookSerializer(serializers.ModelSerializer):
 
         # Get the user and book objects
         user = User.objects.get(username__iexact=username)
-        book = Book.objects.get(title__iexact=book_name)
+        book = Book.objects.by_title(book_name).get()
 
         # Replace the username and book_name in the request data with their respective primary keys
         data['user'] = user.pk
@@ -102,11 +119,17 @@ class ReturnBookSerializer(serializers.ModelSerializer):
         if instance.fine_amount > 0:
             raise serializers.ValidationError(f"You need to pay the stipulated fine amount of #{instance.fine_amount}. Due to not returning the book on time.")
 
-        # Update the return_datetime and fine_paid fields
-        instance.return_datetime = datetime.now()
+        with transaction.atomic():
+            # Update the return_datetime and fine_paid fields, only if no other request returned it first
+            return_datetime = datetime.now()
+            returned = Checkout.objects.filter(pk=instance.pk, return_datetime__isnull=True).update(return_datetime=return_datetime, fine_paid=True)
+            if not returned:
+                raise serializers.ValidationError("This book is already returned.")
+            # Hand the copy to the next patron waiting for it, or put it back on the shelf
+            hand_back_copy(instance.book)
+
+        instance.return_datetime = return_datetime
         instance.fine_paid = True
-        instance.save()
-
         return instance
     
     
@@ -120,11 +143,20 @@ class FinePaymentSerializer(serializers.ModelSerializer):
         read_only_fields = ['paid_to', 'datetime']
         
     def to_internal_value(self, data):
+        # The view already resolved the checkout, so reuse its user and book
+        checkout = self.context.get('checkout')
+        if checkout is not None:
+            try:
+                amount_paid = self.fields['amount_paid'].run_validation(data.get('amount_paid'))
+            except serializers.ValidationError as error:
+                raise serializers.ValidationError({'amount_paid': error.detail})
+            return {'paid_by': checkout.user, 'book': checkout.book, 'amount_paid': amount_paid}
+
         data = data.copy()  # create a mutable copy
         username = data.get('paid_by')
         book_name = data.get('book')
         user = User.objects.get(username__iexact=username)
-        book = Book.objects.get(title__iexact=book_name)
+        book = Book.objects.by_title(book_name).get()
         
         data['paid_by'] = user.pk
         data['book'] = book.pk
@@ -135,30 +167,33 @@ class FinePaymentSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        # Get the username and book name from the validated data
-        username = validated_data.pop('paid_by')
-        book_name = validated_data.pop('book')
-
-        # Get the user and book objects
-        paid_by = User.objects.get(username__iexact=username)
-        book = Book.objects.get(Q(title__iexact=book_name.title))
-        checkout = Checkout.objects.get(Q(user=paid_by) & Q(book=book) & Q(return_datetime__isnull=True))
+        # Get the user and book from the validated data
+        paid_by = validated_data.pop('paid_by')
+        book = validated_data.pop('book')
+        checkout = self.context.get('checkout') or resolve_open_checkout(paid_by.username, book.title)
         
         with transaction.atomic():
-            # Staff ID that is performing the fine payment
-            user_id = self.context['request'].user.id
-            try:
-                user = User.objects.get(id=user_id)
-            except user.DoesNotExist:
-                raise serializers.ValidationError({"user": "User does not exist."})
+            # Staff user that is performing the fine payment
+            user = self.context['request'].user
             pay_datetime = datetime.now()
-            pay_datetime = timezone.make_aware(pay_datetime)
             
             # Update the return_datetime and fine_paid fields in the checkout table
-            checkout.return_datetime = pay_datetime
-            checkout.fine_paid = True
-            checkout.save()
+            returned = Checkout.objects.filter(pk=checkout.pk, return_datetime__isnull=True).update(return_datetime=pay_datetime, fine_paid=True)
+            if not returned:
+                raise serializers.ValidationError("This book is already returned.")
+            # Paying the fine closes the checkout, so the copy goes to the next patron or back on the shelf
+            hand_back_copy(book)
             # Create the FinePayment object
-            fine_payment = FinePayment.objects.create(paid_by=paid_by, paid_to=user, datetime= pay_datetime, book=book_name, **validated_data)
+            fine_payment = FinePayment.objects.create(paid_by=paid_by, paid_to_id=user.id, datetime= pay_datetime, book=book, **validated_data)
 
             return fine_payment
+
+
+class CirculationItemSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150)
+    book = serializers.CharField(max_length=255)
+
+
+class BatchCirculationSerializer(serializers.Serializer):
+    # A stack of items scanned at the desk
+    items = CirculationItemSerializer(many=True, allow_empty=False, max_length=50)
@@ -1,3 +1,495 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from books.models import Author, Book, Item
+from books.inventory import take_copy, return_copy, add_copies
+from rest_framework import status
+from rest_framework.test import APIClient
+from django.core.cache import cache
+from .config import get_checkout_settings, clear_checkout_settings, SETTINGS_KEY
+from .fines import accrue_fines
+from reservations.models import Reservation
+from users.authentication import account_status
+from users.tokens import refresh_token_for
+from .models import Checkout, CheckoutSettings
 
-# Create your tests here.
+
+class InventoryTest(TestCase):
+    def setUp(self):
+        self.book = Book.objects.create(title='Book Title', author=Author.objects.create(name='Author Name'), quantity=1)
+
+    def test_take_and_return_copy(self):
+        self.assertTrue(take_copy(self.book))
+        self.assertFalse(take_copy(self.book))
+        self.assertEqual(Book.objects.get(pk=self.book.pk).available_copies, 0)
+        self.assertTrue(return_copy(self.book))
+        self.assertEqual(Book.objects.get(pk=self.book.pk).available_copies, 1)
+
+    def test_availability_follows_shelf_stock(self):
+        take_copy(self.book)
+        self.assertFalse(Book.objects.get(pk=self.book.pk).availability)
+        add_copies(self.book, 2)
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual((book.quantity, book.available_copies, book.availability), (3, 2, True))
+
+    def test_availability_is_set_before_available_copies(self):
+        # MySQL evaluates SET left to right, so availability has to read the old count
+        with CaptureQueriesContext(connection) as queries:
+            take_copy(self.book)
+            add_copies(self.book, 1)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            self.assertLess(sql.index('"availability" ='), sql.index('"available_copies" ='))
+
+    def test_quantity_cannot_drop_below_copies_on_loan(self):
+        Book.objects.filter(pk=self.book.pk).update(quantity=2, available_copies=1)
+        url = f'http://127.0.0.1:8000/api/books/update-book/{self.book.pk}/'
+        response = APIClient().patch(url, {'quantity': 0, 'description': 'Edited'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual((book.quantity, book.available_copies, book.description), (2, 1, ''))
+
+        response = APIClient().patch(url, {'quantity': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual((book.quantity, book.available_copies, book.availability), (1, 0, False))
+
+
+class ReconcileStockTest(TestCase):
+    def test_reconcile_repairs_drift(self):
+        user = User.objects.create_user(username='reader', password='password')
+        author = Author.objects.create(name='Author Name')
+        drifted = Book.objects.create(title='Drifted', author=author, quantity=3)
+        correct = Book.objects.create(title='Correct', author=author, quantity=2)
+        Checkout.objects.create(user=user, book=drifted, due_datetime=drifted.updated_at)
+        Checkout.objects.create(user=user, book=drifted, due_datetime=drifted.updated_at)
+        Book.objects.filter(pk=correct.pk).update(available_copies=2)
+
+        out = StringIO()
+        call_command('reconcile_stock', stdout=out)
+        self.assertIn('1 books repaired', out.getvalue())
+        self.assertEqual(Book.objects.get(pk=drifted.pk).available_copies, 1)
+        self.assertEqual(Book.objects.get(pk=correct.pk).available_copies, 2)
+
+    def test_reconcile_keeps_held_copies_off_the_shelf(self):
+        user = User.objects.create_user(username='reader', password='password')
+        book = Book.objects.create(title='Held', author=Author.objects.create(name='Author Name'), quantity=1)
+        Book.objects.filter(pk=book.pk).update(available_copies=0, availability=False)
+        Reservation.objects.create(user=user, book=book, status=Reservation.READY)
+
+        out = StringIO()
+        call_command('reconcile_stock', stdout=out)
+        self.assertIn('0 books repaired', out.getvalue())
+        self.assertEqual(Book.objects.get(pk=book.pk).available_copies, 0)
+
+
+class InventoryConcurrencyTest(TransactionTestCase):
+    copies = 5
+    workers = 40
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Popular Book', author=Author.objects.create(name='Author Name'), quantity=self.copies)
+
+    def checkout(self, start, results):
+        start.wait()
+        try:
+            while True:
+                try:
+                    results.append(take_copy(self.book))
+                    return
+                except OperationalError:
+                    # SQLite allows one writer at a time, retry when the table is locked
+                    continue
+        finally:
+            connection.close()
+
+    def test_no_oversell_under_concurrency(self):
+        start = threading.Barrier(self.workers)
+        results = []
+        threads = [threading.Thread(target=self.checkout, args=(start, results)) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), self.workers)
+        self.assertEqual(results.count(True), self.copies)
+        self.assertEqual(Book.objects.get(pk=self.book.pk).available_copies, 0)
+
+
+class CheckoutSettingsCacheTest(TestCase):
+    def setUp(self):
+        clear_checkout_settings()
+        self.user = User.objects.create_user(username='reader', password='password')
+        self.admin = User.objects.create_superuser(username='admin', password='password')
+        self.settings = CheckoutSettings.objects.create(notice='Bring it back.')
+
+    def test_settings_are_read_once(self):
+        get_checkout_settings()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_checkout_settings().notice, 'Bring it back.')
+
+    def test_update_clears_the_cache(self):
+        get_checkout_settings()
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.patch(f'http://127.0.0.1:8000/api/checkouts/update-checkout-settings/{self.settings.pk}/', {'notice': 'New notice.'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_checkout_settings().notice, 'New notice.')
+
+    def test_settings_cached_before_commit_are_dropped(self):
+        stale = get_checkout_settings()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.settings.notice = 'New notice.'
+            self.settings.save()
+            # A concurrent request reads the row before the commit and caches it again
+            cache.set(SETTINGS_KEY, stale, None)
+        self.assertEqual(get_checkout_settings().notice, 'New notice.')
+
+    def test_notice_revalidation(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('http://127.0.0.1:8000/api/checkouts/checkout-notice/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+
+        response = client.get('http://127.0.0.1:8000/api/checkouts/checkout-notice/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are checked with SQLite EXPLAIN QUERY PLAN')
+class CirculationQueryPlanTest(TestCase):
+    # Tables whose lookups on the circulation paths must never be full scans
+    indexed_tables = ['books_book', 'books_author', 'books_item', 'checkouts_checkout']
+    books = 3000
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = Author.objects.bulk_create([Author(name=f'Author {i}') for i in range(300)])
+        Book.objects.bulk_create([
+            Book(title=f'Book {i}', isbn=f'978{i:010d}', author=authors[i % 300], quantity=2, available_copies=2)
+            for i in range(cls.books)
+        ])
+        users = User.objects.bulk_create([User(username=f'reader{i}') for i in range(300)])
+        now = datetime.now()
+        books = list(Book.objects.order_by('id')[:1500])
+        Checkout.objects.bulk_create([
+            Checkout(user=users[i % 300], book=book, due_datetime=now,
+                     return_datetime=None if i % 2 else now)
+            for i, book in enumerate(books)
+        ])
+        Item.objects.bulk_create([Item(book=book, barcode=f'BC{book.pk:06d}') for book in Book.objects.order_by('id')])
+        cls.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        cls.reader = User.objects.create_user(username='newreader', password='password')
+        CheckoutSettings.objects.create()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        clear_checkout_settings()
+
+    def full_scans(self, queries):
+        scans = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for row in cursor.fetchall():
+                    # Full scans read "SCAN table" (or "SCAN TABLE table" on older SQLite)
+                    words = row[-1].replace('SCAN TABLE ', 'SCAN ').split()
+                    if words[:1] == ['SCAN'] and words[1] in self.indexed_tables:
+                        scans.append((query['sql'], row[-1]))
+        return scans
+
+    def post(self, user, url, data):
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(f'http://127.0.0.1:8000/api/checkouts/{url}', data, format='json')
+        return response, context.captured_queries
+
+    def test_lookups_use_indexes(self):
+        self.assertIn('book_title_lower_idx', Book.objects.by_title('book 42').explain())
+        self.assertIn('SEARCH books_book USING INDEX', Book.objects.filter(isbn='9780000000042').explain())
+        self.assertIn('checkout_open_idx', Checkout.objects.filter(user_id=1, book_id=1, return_datetime__isnull=True).explain())
+
+    def test_checkout_uses_indexes(self):
+        response, queries = self.post(self.reader, 'checkout/', {'book': 'BOOK 2999'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.full_scans(queries), [])
+
+    def test_return_book_uses_indexes(self):
+        checkout = Checkout.objects.filter(return_datetime__isnull=True).select_related('user', 'book').first()
+        response, queries = self.post(self.staff, 'return-book/', {'username': checkout.user.username, 'book': checkout.book.title.upper()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.full_scans(queries), [])
+
+    def test_barcode_circulation_uses_indexes(self):
+        barcode = Item.objects.get(book__title='Book 2999').barcode
+        response, queries = self.post(self.reader, 'checkout/', {'barcode': barcode})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.full_scans(queries), [])
+        response, queries = self.post(self.staff, 'return-book/', {'barcode': barcode})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.full_scans(queries), [])
+
+
+class CirculationQueryCountTest(TestCase):
+    def setUp(self):
+        clear_checkout_settings()
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.reader = User.objects.create_user(username='reader', password='password')
+        self.book = Book.objects.create(title='Book Title', author=Author.objects.create(name='Author Name'), quantity=1)
+        Book.objects.filter(pk=self.book.pk).update(available_copies=0)
+        self.checkout = Checkout.objects.create(user=self.reader, book=self.book, due_datetime=datetime.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_return_book_query_count(self):
+        # Resolve the checkout, close it, check the hold queue and restock the book, plus the savepoint pair
+        with self.assertNumQueries(6):
+            response = self.client.post('http://127.0.0.1:8000/api/checkouts/return-book/', {'username': 'READER', 'book': 'book title'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Book.objects.get(pk=self.book.pk).available_copies, 1)
+
+    def test_fine_payment_query_count(self):
+        Checkout.objects.filter(pk=self.checkout.pk).update(fine_amount=50)
+        # Resolve the checkout, close it, check the hold queue, restock the book and record the payment, plus the savepoint pair
+        with self.assertNumQueries(7):
+            response = self.client.post('http://127.0.0.1:8000/api/checkouts/fine-payment/', {'paid_by': 'reader', 'book': 'Book Title', 'amount_paid': 50}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['paid_to'], self.staff.pk)
+        self.assertIsNotNone(Checkout.objects.get(pk=self.checkout.pk).return_datetime)
+
+    def test_checkout_query_count(self):
+        Book.objects.filter(pk=self.book.pk).update(available_copies=1)
+        other = User.objects.create_user(username='other', password='password')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh_token_for(other).access_token}')
+        CheckoutSettings.objects.create()
+        get_checkout_settings()
+        account_status(other.id)
+        # Resolve the book, check for an open checkout, claim a hold or take a copy and record the checkout,
+        # plus the savepoint pair; the user comes from the token claims
+        with self.assertNumQueries(7):
+            response = client.post('http://127.0.0.1:8000/api/checkouts/checkout/', {'book': 'Book Title'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['user'], other.pk)
+
+    def test_unknown_book_is_reported(self):
+        response = self.client.post('http://127.0.0.1:8000/api/checkouts/return-book/', {'username': 'reader', 'book': 'Other Title'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['detail'], 'The library does not have this book.')
+
+
+class ItemCirculationTest(TestCase):
+    def setUp(self):
+        clear_checkout_settings()
+        CheckoutSettings.objects.create()
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.reader = User.objects.create_user(username='reader', password='password')
+        self.book = Book.objects.create(title='Book Title', author=Author.objects.create(name='Author Name'), quantity=0)
+        self.client = APIClient()
+
+    def stock(self):
+        book = Book.objects.get(pk=self.book.pk)
+        return book.quantity, book.available_copies, book.availability
+
+    def post(self, user, url, data):
+        self.client.force_authenticate(user)
+        return self.client.post(f'http://127.0.0.1:8000/api/{url}', data, format='json')
+
+    def test_items_maintain_the_counters(self):
+        response = self.post(self.staff, 'books/add-item/', {'book': 'book title', 'barcode': 'BC0001'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        Item.objects.create(book=self.book, barcode='BC0002')
+        self.assertEqual(self.stock(), (2, 2, True))
+
+        self.post(self.reader, 'checkouts/checkout/', {'barcode': 'BC0001'})
+        # Withdrawing the copy on loan leaves the shelf alone, the one on the shelf empties it
+        Item.objects.get(barcode='BC0001').delete()
+        self.assertEqual(self.stock(), (1, 1, True))
+        Item.objects.get(barcode='BC0002').delete()
+        self.assertEqual(self.stock(), (0, 0, False))
+
+    def test_barcoding_counted_copies_adds_none(self):
+        self.book = Book.objects.create(title='Counted Book', author=self.book.author, quantity=2)
+        Item.objects.create(book=self.book, barcode='BC0001')
+        Item.objects.create(book=self.book, barcode='BC0002')
+        self.assertEqual(self.stock(), (2, 2, True))
+        Item.objects.create(book=self.book, barcode='BC0003')
+        self.assertEqual(self.stock(), (3, 3, True))
+
+    def test_checkout_and_return_by_barcode(self):
+        item = Item.objects.create(book=self.book, barcode='BC0001')
+        response = self.post(self.reader, 'checkouts/checkout/', {'barcode': 'BC0001'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Checkout.objects.get().item, item)
+        self.assertEqual(self.stock(), (1, 0, False))
+
+        other = User.objects.create_user(username='other', password='password')
+        response = self.post(other, 'checkouts/checkout/', {'barcode': 'BC0001'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, ['This copy is already checked out.'])
+
+        response = self.post(self.staff, 'checkouts/return-book/', {'barcode': 'BC0001'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.stock(), (1, 1, True))
+        response = self.post(self.staff, 'checkouts/return-book/', {'barcode': 'BC0001'})
+        self.assertEqual(response.data['detail'], 'This copy is not checked out.')
+
+    def test_fine_payment_by_barcode(self):
+        Item.objects.create(book=self.book, barcode='BC0001')
+        self.post(self.reader, 'checkouts/checkout/', {'barcode': 'BC0001'})
+        Checkout.objects.update(fine_amount=50)
+        response = self.post(self.staff, 'checkouts/fine-payment/', {'barcode': 'BC0001', 'amount_paid': 50})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(Checkout.objects.get().return_datetime)
+        self.assertEqual(self.stock(), (1, 1, True))
+
+    def test_unknown_barcode(self):
+        response = self.post(self.reader, 'checkouts/checkout/', {'barcode': 'missing'})
+        self.assertEqual(response.data, {'barcode': 'No copy has this barcode.'})
+        response = self.post(self.staff, 'checkouts/return-book/', {'barcode': 'missing'})
+        self.assertEqual(response.data['detail'], 'No copy has this barcode.')
+
+    def test_reconcile_counts_items(self):
+        Item.objects.bulk_create([Item(book=self.book, barcode=f'BC{i}') for i in range(3)])
+        call_command('reconcile_stock', stdout=StringIO())
+        self.assertEqual(self.stock(), (3, 3, True))
+
+
+class FineAccrualTest(TestCase):
+    def setUp(self):
+        clear_checkout_settings()
+        CheckoutSettings.objects.create(fine_amount=Decimal('2.50'))
+        self.user = User.objects.create_user(username='reader', password='password')
+        self.book = Book.objects.create(title='Book Title')
+        self.now = datetime(2024, 5, 20, 12, 0)
+
+    def checkout(self, days_overdue, returned=False):
+        return Checkout.objects.create(
+            user=self.user, book=self.book,
+            due_datetime=self.now - timedelta(days=days_overdue, hours=1),
+            return_datetime=self.now if returned else None,
+        )
+
+    def test_fines_follow_days_overdue(self):
+        late = self.checkout(3)
+        very_late = self.checkout(10)
+        on_time = Checkout.objects.create(user=self.user, book=self.book, due_datetime=self.now + timedelta(days=1))
+        returned = self.checkout(5, returned=True)
+
+        self.assertEqual(accrue_fines(now=self.now, batch_size=1), 2)
+        fines = dict(Checkout.objects.values_list('id', 'fine_amount'))
+        self.assertEqual(fines[late.pk], Decimal('7.50'))
+        self.assertEqual(fines[very_late.pk], Decimal('25.00'))
+        self.assertEqual(fines[on_time.pk], 0)
+        self.assertEqual(fines[returned.pk], 0)
+
+    def test_accrual_is_idempotent_and_incremental(self):
+        late = self.checkout(3)
+        accrue_fines(now=self.now)
+        self.assertEqual(accrue_fines(now=self.now), 0)
+        self.assertEqual(accrue_fines(now=self.now + timedelta(days=1)), 1)
+        self.assertEqual(Checkout.objects.get(pk=late.pk).fine_amount, Decimal('10.00'))
+
+
+class BatchCirculationTest(TestCase):
+    def setUp(self):
+        clear_checkout_settings()
+        CheckoutSettings.objects.create(due_days=7)
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.readers = [User.objects.create_user(username=f'reader{i}', password='password') for i in range(6)]
+        author = Author.objects.create(name='Author Name')
+        self.books = [Book.objects.create(title=f'Book {i}', author=author, quantity=2) for i in range(6)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def post(self, name, items):
+        response = self.client.post(f'http://127.0.0.1:8000/api/checkouts/{name}/', {'items': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [result['status'] if result['status'] != 'error' else result['error'] for result in response.data['results']]
+
+    def stock(self, book):
+        return Book.objects.get(pk=book.pk).available_copies
+
+    def test_batch_checkout(self):
+        Book.objects.filter(pk=self.books[1].pk).update(available_copies=0)
+        Reservation.objects.create(user=self.readers[3], book=self.books[1], status=Reservation.READY)
+        results = self.post('batch-checkout', [
+            {'username': 'reader0', 'book': 'book 0'},
+            {'username': 'READER1', 'book': 'Book 0'},
+            {'username': 'reader2', 'book': 'Book 0'},
+            {'username': 'reader3', 'book': 'Book 1'},
+            {'username': 'reader4', 'book': 'Book 1'},
+            {'username': 'reader0', 'book': 'Book 2'},
+            {'username': 'nobody', 'book': 'Book 2'},
+            {'username': 'reader5', 'book': 'Missing Book'},
+        ])
+        self.assertEqual(results, [
+            'checked_out',
+            'checked_out',
+            'The book is currently unavailable and only available for reservation.',
+            'checked_out',
+            'The book is currently unavailable and only available for reservation.',
+            'reader0 has a book checked out and needs to return it first.',
+            'User does not exist.',
+            'The library does not have this book.',
+        ])
+        self.assertEqual(self.stock(self.books[0]), 0)
+        self.assertFalse(Book.objects.get(pk=self.books[0].pk).availability)
+        self.assertEqual(Reservation.objects.get(user=self.readers[3]).status, Reservation.FULFILLED)
+        self.assertEqual(Checkout.objects.filter(return_datetime__isnull=True).count(), 3)
+
+    def test_batch_return(self):
+        for reader, book in zip(self.readers[:4], self.books[:4]):
+            Checkout.objects.create(user=reader, book=book, due_datetime=datetime.now())
+        Checkout.objects.filter(user=self.readers[2]).update(fine_amount=10)
+        Reservation.objects.create(user=self.readers[5], book=self.books[1])
+        results = self.post('batch-return-book', [
+            {'username': 'reader0', 'book': 'Book 0'},
+            {'username': 'reader1', 'book': 'book 1'},
+            {'username': 'reader2', 'book': 'Book 2'},
+            {'username': 'reader3', 'book': 'Book 0'},
+            {'username': 'reader0', 'book': 'Book 0'},
+        ])
+        self.assertEqual(results, [
+            'returned',
+            'returned',
+            'A fine of #10.00 must be paid before this book is returned.',
+            'reader3 did not borrow this book.',
+            'reader0 did not borrow this book.',
+        ])
+        self.assertEqual(self.stock(self.books[0]), 3)
+        # The copy of Book 1 goes to the patron waiting for it
+        self.assertEqual(self.stock(self.books[1]), 2)
+        self.assertEqual(Reservation.objects.get(user=self.readers[5]).status, Reservation.READY)
+        self.assertEqual(Checkout.objects.filter(return_datetime__isnull=True).count(), 2)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        items = [{'username': f'reader{i}', 'book': f'Book {i}'} for i in range(6)]
+        get_checkout_settings()
+        with CaptureQueriesContext(connection) as small:
+            self.post('batch-checkout', items[:2])
+        with CaptureQueriesContext(connection) as large:
+            self.post('batch-checkout', items[2:])
+        self.assertEqual(len(small), len(large))
+
+        with CaptureQueriesContext(connection) as small:
+            self.post('batch-return-book', items[:2])
+        with CaptureQueriesContext(connection) as large:
+            self.post('batch-return-book', items[2:])
+        self.assertEqual(len(small), len(large))
+
+    def test_batch_must_not_be_empty(self):
+        response = self.client.post('http://127.0.0.1:8000/api/checkouts/batch-checkout/', {'items': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import AddCheckoutSettingsAPI, UpdateCheckoutSettingsAPIView, CheckoutNoticeAPIView, CheckoutAPIView
-from .views import ReturnBookAPIView, FinePaymentAPIView
+from .views import ReturnBookAPIView, FinePaymentAPIView, BatchCheckoutAPIView, BatchReturnBookAPIView
 
 
 urlpatterns = [
@@ -10,4 +10,6 @@ urlpatterns = [
     path('checkout/', CheckoutAPIView.as_view(), name='checkout'),
     path('return-book/', ReturnBookAPIView.as_view(), name='return-book'),
     path('fine-payment/', FinePaymentAPIView.as_view(), name='fine-payment'),
+    path('batch-checkout/', BatchCheckoutAPIView.as_view(), name='batch-checkout'),
+    path('batch-return-book/', BatchReturnBookAPIView.as_view(), name='batch-return-book'),
 ]
\ No newline at end of file
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from checkouts.models import CheckoutSettings
 from .serializers import CheckoutSettingsSerializer, FinePaymentSerializer
-from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated, BasePermission
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.generics import UpdateAPIView, CreateAPIView
 from .serializers import CheckoutSerializer
 from .models import Checkout
@@ -12,19 +12,25 @@ from django.db.models import Q
 from .serializers import ReturnBookSerializer
 from books.models import Book
 from rest_framework.exceptions import NotFound
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .config import get_checkout_settings
+from .context import resolve_open_checkout, resolve_item_checkout
+from .circulation import checkout_items, return_items
+from .serializers import BatchCirculationSerializer
+from users.authentication import ClaimsJWTAuthentication
+from users.permissions import IsAdminOrStaffUser, IsAdminUser
+import hashlib
 
 # Create your views here.
 
-class IsAdminOrStaffUser(BasePermission):
-    def has_permission(self, request, view):
-        return request.user.is_superuser or request.user.is_staff
-    
-    
+# Checkout views authorise from the token claims instead of loading the user on every request
+
 class AddCheckoutSettingsAPI(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]  # Allow authenticated access
     def post(self, request, format=None):
-        existing_table = CheckoutSettings.objects.filter(id=1)
-        if existing_table.exists():
+        if get_checkout_settings() is not None:
             return Response({'message': 'Checkout settings already exist. Update values of table instead.'}, status=status.HTTP_400_BAD_REQUEST)
         serializer = CheckoutSettingsSerializer(data=request.data)
         if serializer.is_valid():
@@ -35,53 +41,48 @@ class AddCheckoutSettingsAPI(APIView):
     
 
 class UpdateCheckoutSettingsAPIView(UpdateAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAdminUser]  # Allow only admin users to access
     queryset = CheckoutSettings.objects.all()
     serializer_class = CheckoutSettingsSerializer
     
     
 class CheckoutNoticeAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
     def get(self, request):
-        checkout_settings = CheckoutSettings.objects.first()  # Assuming there's only one checkout settings instance
+        checkout_settings = get_checkout_settings()  # Assuming there's only one checkout settings instance
         if checkout_settings:
             notice = checkout_settings.notice
-            return Response({"notice": notice})
+            # Let clients revalidate the notice instead of downloading it again
+            etag = '"%s"' % hashlib.md5(f"{checkout_settings.updated_at}{notice}".encode()).hexdigest()
+            last_modified = int(checkout_settings.updated_at.timestamp())
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            response = not_modified or Response({"notice": notice})
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            return response
         else:
             return Response({"message": "Checkout settings not found."}, status=404)
 
 
 class CheckoutAPIView(CreateAPIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
     queryset = Checkout.objects.all()
     serializer_class = CheckoutSerializer
     
 
 class ReturnBookAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAdminOrStaffUser]
 
     def post(self, request, *args, **kwargs):
-        # Get the username and book name from the request data
-        username = request.data.get('username')
-        book_name = request.data.get('book')
-
-        # Get the user and book objects
-        try:
-            user = User.objects.get(username__iexact=username)
-        except User.DoesNotExist:
-            raise NotFound(detail="User does not exist.", code=404)
-        try:
-            book = Book.objects.get(title__iexact=book_name)
-        except Book.DoesNotExist:
-            raise NotFound(detail="The library does not have this book.", code=404)
-        # Get the checkout object
-        try:
-            checkout = Checkout.objects.get(Q(user=user) & Q(book=book) & Q(return_datetime__isnull=True))
-        except Checkout.DoesNotExist:
-            raise NotFound(detail=f"{user} did not borrow this book.", code=404)
+        # Get the open checkout, with its user and book, in one query
+        checkout = self.get_checkout(request)
 
-        # Create a serializer instance
-        serializer = ReturnBookSerializer(checkout, data=request.data, partial=True)
+        # Create a serializer instance, it reuses the resolved checkout instead of looking it up again
+        serializer = ReturnBookSerializer(checkout, data=request.data, partial=True, context={'request': request, 'checkout': checkout})
 
         # Validate and save the serializer
         if serializer.is_valid():
@@ -89,33 +90,32 @@ class ReturnBookAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def get_checkout(self, request):
+        # A scanned barcode names the copy, otherwise the username and book title name the loan
+        barcode = request.data.get('barcode')
+        if barcode:
+            return resolve_item_checkout(barcode)
+        return resolve_open_checkout(request.data.get('username'), request.data.get('book'))
         
         
 class FinePaymentAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAdminOrStaffUser]
 
     def post(self, request, *args, **kwargs):
-        username = request.data.get('paid_by')
-        book_name = request.data.get('book')
-        try:
-            user = User.objects.get(username__iexact=username)
-        except User.DoesNotExist:
-            raise NotFound(detail="User does not exist.", code=404)
-        try:
-            book = Book.objects.get(title__iexact=book_name)
-        except Book.DoesNotExist:
-            raise NotFound(detail="The library does not have this book.", code=404)
-        # Get the checkout object
-        try:
-            checkout = Checkout.objects.get(Q(user=user) & Q(book=book) & Q(return_datetime__isnull=True))
-        except Checkout.DoesNotExist:
-            raise NotFound(detail=f"{user} did not borrow this book.", code=404)
+        # Get the open checkout, with its user and book, in one query
+        barcode = request.data.get('barcode')
+        if barcode:
+            checkout = resolve_item_checkout(barcode)
+        else:
+            checkout = resolve_open_checkout(request.data.get('paid_by'), request.data.get('book'))
         # Check is amount paid is same with the fine payment of the user
         if int(request.data.get('amount_paid')) != int(checkout.fine_amount):
             raise NotFound(detail=f"The amount paid by the user is not the same as the fine overdue payment, which is #{checkout.fine_amount}", code=404)
         # Create a serializer instance
         #serializer = FinePaymentSerializer(data=request.data)
-        serializer = FinePaymentSerializer(data=request.data, context={'request': request})
+        serializer = FinePaymentSerializer(data=request.data, context={'request': request, 'checkout': checkout})
 
 
         # Validate and save the serializer
@@ -124,4 +124,29 @@ class FinePaymentAPIView(APIView):
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
\ No newline at end of file
+
+
+class BatchCheckoutAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrStaffUser]
+
+    def post(self, request, *args, **kwargs):
+        # Check out a list of {username, book} items in one transaction, with a result per item
+        serializer = BatchCirculationSerializer(data=request.data)
+        if serializer.is_valid():
+            results = checkout_items(serializer.validated_data['items'])
+            return Response({'results': results}, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class BatchReturnBookAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrStaffUser]
+
+    def post(self, request, *args, **kwargs):
+        # Return a list of {username, book} items in one transaction, with a result per item
+        serializer = BatchCirculationSerializer(data=request.data)
+        if serializer.is_valid():
+            results = return_items(serializer.validated_data['items'])
+            return Response({'results': results}, status=status.HTTP_200_OK)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,66 @@
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+from .stats import current, record, timed, add_request
+
+
+def count_query(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record('queries')
+        record('query_seconds', time.perf_counter() - start)
+
+
+def time_serializers():
+    # Time serializer output and validation, patched in only when profiling is on
+    if getattr(BaseSerializer, '_profiled', False):
+        return
+    data, is_valid = BaseSerializer.data.fget, BaseSerializer.is_valid
+
+    def profiled_data(self):
+        with timed('serializer_seconds'):
+            return data(self)
+
+    def profiled_is_valid(self, *args, **kwargs):
+        with timed('serializer_seconds'):
+            return is_valid(self, *args, **kwargs)
+
+    BaseSerializer.data = property(profiled_data)
+    BaseSerializer.is_valid = profiled_is_valid
+    BaseSerializer._profiled = True
+
+
+class ProfilingMiddleware:
+    """
+    Records the latency, SQL queries, catalog cache hits and misses and
+    serializer time of every request, grouped by URL name. It is opt in:
+    unless PROFILING_ENABLED is set it removes itself from the middleware
+    chain and costs nothing.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        time_serializers()
+
+    def __call__(self, request):
+        token = current.set({})
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(count_query))
+                response = self.get_response(request)
+            return response
+        finally:
+            latency = time.perf_counter() - start
+            counters = current.get()
+            current.reset(token)
+            match = getattr(request, 'resolver_match', None)
+            add_request(match.url_name if match and match.url_name else 'unresolved', latency, counters)
@@ -0,0 +1,98 @@
+import threading
+import time
+from contextvars import ContextVar
+
+# Request latency histogram buckets, in milliseconds
+LATENCY_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Counters of the request being profiled, None when profiling is off
+current = ContextVar('profiling_current', default=None)
+
+_lock = threading.Lock()
+_endpoints = {}
+
+
+def record(name, amount=1):
+    # Add to a counter of the current request, does nothing outside a profiled request
+    counters = current.get()
+    if counters is not None:
+        counters[name] = counters.get(name, 0) + amount
+
+
+class timed:
+    """
+    Adds the seconds spent in the block to a counter of the current request.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter() - self.start)
+
+
+def new_endpoint():
+    return {
+        'requests': 0,
+        'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        'latency_seconds': 0.0,
+        'queries': 0,
+        'query_seconds': 0.0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'serializer_seconds': 0.0,
+    }
+
+
+def add_request(url_name, latency, counters):
+    milliseconds = latency * 1000
+    bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if milliseconds <= bound), len(LATENCY_BUCKETS))
+    with _lock:
+        endpoint = _endpoints.setdefault(url_name, new_endpoint())
+        endpoint['requests'] += 1
+        endpoint['latency_buckets'][bucket] += 1
+        endpoint['latency_seconds'] += latency
+        for name, amount in counters.items():
+            endpoint[name] += amount
+
+
+def endpoint_stats():
+    # Stats are kept per process, each worker reports the requests it served
+    with _lock:
+        return {name: dict(endpoint, latency_buckets=list(endpoint['latency_buckets'])) for name, endpoint in _endpoints.items()}
+
+
+def reset_stats():
+    with _lock:
+        _endpoints.clear()
+
+
+def prometheus_text():
+    lines = [
+        '# HELP library_request_duration_seconds Request latency per URL name.',
+        '# TYPE library_request_duration_seconds histogram',
+    ]
+    stats = endpoint_stats()
+    for name, endpoint in sorted(stats.items()):
+        cumulative = 0
+        for bound, hits in zip(LATENCY_BUCKETS + ['+Inf'], endpoint['latency_buckets']):
+            cumulative += hits
+            le = bound if bound == '+Inf' else bound / 1000
+            lines.append(f'library_request_duration_seconds_bucket{{url_name="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'library_request_duration_seconds_sum{{url_name="{name}"}} {endpoint["latency_seconds"]}')
+        lines.append(f'library_request_duration_seconds_count{{url_name="{name}"}} {endpoint["requests"]}')
+    for metric, key, kind, help_text in [
+        ('library_sql_queries_total', 'queries', 'counter', 'SQL queries run per URL name.'),
+        ('library_sql_query_seconds_total', 'query_seconds', 'counter', 'Time spent in SQL queries per URL name.'),
+        ('library_cache_hits_total', 'cache_hits', 'counter', 'Catalog cache hits per URL name.'),
+        ('library_cache_misses_total', 'cache_misses', 'counter', 'Catalog cache misses per URL name.'),
+        ('library_serializer_seconds_total', 'serializer_seconds', 'counter', 'Time spent serializing and validating per URL name.'),
+    ]:
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} {kind}')
+        for name, endpoint in sorted(stats.items()):
+            lines.append(f'{metric}{{url_name="{name}"}} {endpoint[key]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from books.models import Author, Genre, Book
+from .stats import endpoint_stats, reset_stats
+
+
+@override_settings(
+    PROFILING_ENABLED=True,
+    MIDDLEWARE=[
+        'profiling.middleware.ProfilingMiddleware',
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    ],
+)
+class ProfilingMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_stats()
+        author = Author.objects.create(name='Author Name')
+        genre = Genre.objects.create(name='Fantasy')
+        for i in range(3):
+            Book.objects.create(title=f'Book {i}', author=author, genre=genre)
+        self.client = APIClient()
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get('/api/books/book-view/')
+        self.client.get('/api/books/book-view/')
+        self.client.get('/api/books/next-paginator/')
+        stats = endpoint_stats()
+
+        book_view = stats['book-view']
+        self.assertEqual(book_view['requests'], 2)
+        self.assertEqual(sum(book_view['latency_buckets']), 2)
+        self.assertEqual(book_view['queries'], 1)
+        self.assertEqual(book_view['cache_hits'], 1)
+        self.assertEqual(book_view['cache_misses'], 1)
+        self.assertGreater(book_view['serializer_seconds'], 0)
+
+        self.assertEqual(stats['next-paginator']['requests'], 1)
+        self.assertEqual(stats['next-paginator']['queries'], 1)
+
+    def test_stats_endpoints_are_staff_only(self):
+        self.client.get('/api/books/book-view/')
+        self.assertEqual(self.client.get('/api/profiling/stats/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(self.staff)
+        response = self.client.get('/api/profiling/stats/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['book-view']['requests'], 1)
+
+        metrics = self.client.get('/api/profiling/metrics/').content.decode()
+        self.assertIn('library_request_duration_seconds_count{url_name="book-view"} 1', metrics)
+        self.assertIn('library_request_duration_seconds_bucket{url_name="book-view",le="+Inf"} 1', metrics)
+        self.assertIn('library_sql_queries_total{url_name="book-view"} 1', metrics)
+
+
+class ProfilingDisabledTest(TestCase):
+    def test_nothing_is_recorded(self):
+        reset_stats()
+        with override_settings(MIDDLEWARE=['profiling.middleware.ProfilingMiddleware']):
+            self.client.get('/api/books/book-view/')
+        self.assertEqual(endpoint_stats(), {})
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import EndpointStatsAPIView, PrometheusMetricsAPIView
+
+
+urlpatterns = [
+    path('stats/', EndpointStatsAPIView.as_view(), name='endpoint-stats'),
+    path('metrics/', PrometheusMetricsAPIView.as_view(), name='prometheus-metrics'),
+]
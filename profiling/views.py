@@ -0,0 +1,28 @@
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from users.authentication import ClaimsJWTAuthentication
+from users.permissions import IsAdminOrStaffUser
+from .stats import endpoint_stats, reset_stats, prometheus_text
+
+# Create your views here.
+
+class EndpointStatsAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrStaffUser]
+
+    def get(self, request):
+        return Response(endpoint_stats(), status=status.HTTP_200_OK)
+
+    def delete(self, request):
+        reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PrometheusMetricsAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminOrStaffUser]
+
+    def get(self, request):
+        return HttpResponse(prometheus_text(), content_type='text/plain; version=0.0.4')
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from replicas.routers import replica_databases
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over the replica databases, standing in for replication locally'
+
+    def handle(self, *args, **options):
+        replicas = replica_databases()
+        if not replicas:
+            raise CommandError('No REPLICA_DATABASES are configured.')
+        primary = connections[DEFAULT_DB_ALIAS]
+        for alias in [DEFAULT_DB_ALIAS, *replicas]:
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias} is not a SQLite database, its replicas follow the database\'s own replication.')
+
+        primary.ensure_connection()
+        for alias in replicas:
+            replica = connections[alias]
+            replica.ensure_connection()
+            # SQLite's online backup copies every page of the primary in one step
+            primary.connection.backup(replica.connection)
+            self.stdout.write(self.style.SUCCESS(f'{alias} is in sync with {DEFAULT_DB_ALIAS}.'))
@@ -0,0 +1,31 @@
+from django.core.exceptions import MiddlewareNotUsed
+from .routers import RequestState, current, replica_apps, replica_databases, pin_apps, pin_user, request_user_id
+
+
+class ReplicaMiddleware:
+    """
+    Hands the request to the ReplicaRouter and, once the response is
+    ready, pins the user who wrote and the apps written to the primary so
+    their next reads see the write. Without REPLICA_DATABASES it removes
+    itself from the middleware chain.
+    """
+
+    def __init__(self, get_response):
+        if not replica_databases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RequestState(request)
+        token = current.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            current.reset(token)
+            if state.written:
+                user_id = request_user_id(request)
+                if user_id is not None:
+                    pin_user(user_id)
+                written = state.written & set(replica_apps())
+                if written:
+                    pin_apps(written)
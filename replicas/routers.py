@@ -0,0 +1,122 @@
+import random
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Apps whose reads may be served by a replica: the catalog and the user
+# listings. Circulation (checkouts, reservations) always stays on the primary.
+REPLICA_APPS = ['books', 'auth', 'users']
+# How long reads stay on the primary after a write, long enough to cover the
+# replication lag
+PIN_SECONDS = 5
+USER_PIN_KEY = 'replica_pin_user_{}'
+APP_PIN_KEY = 'replica_pin_app_{}'
+
+# Routing state of the current request, None outside a request
+current = ContextVar('replicas_current', default=None)
+
+
+def replica_databases():
+    return list(getattr(settings, 'REPLICA_DATABASES', []))
+
+
+def replica_apps():
+    return getattr(settings, 'REPLICA_APPS', REPLICA_APPS)
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', PIN_SECONDS)
+
+
+def pin_apps(app_labels):
+    # Catalog pages are cached once built, so after a write every reader of
+    # the app is sent to the primary until the replicas have caught up
+    cache.set_many({APP_PIN_KEY.format(label): 1 for label in app_labels}, pin_seconds())
+
+
+def pin_user(user_id):
+    cache.set(USER_PIN_KEY.format(user_id), 1, pin_seconds())
+
+
+def request_user_id(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.id
+    return None
+
+
+class RequestState:
+    """
+    What the router knows about the request being served: whether it may
+    read from a replica at all, which one it reads from, and the pins
+    looked up for it, each fetched from the cache at most once.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.read_only = request.method in ('GET', 'HEAD', 'OPTIONS')
+        self.replica = None
+        self.pinned_apps = None
+        self.user_pinned = None
+        self.written = set()
+
+    def pinned(self, app_label):
+        if self.pinned_apps is None:
+            keys = {APP_PIN_KEY.format(label): label for label in replica_apps()}
+            self.pinned_apps = {keys[key] for key in cache.get_many(list(keys))}
+        if app_label in self.pinned_apps:
+            return True
+        if self.user_pinned is None:
+            # The user is only known once the view has authenticated the request
+            user_id = request_user_id(self.request)
+            if user_id is None:
+                return False
+            self.user_pinned = cache.get(USER_PIN_KEY.format(user_id)) is not None
+        return self.user_pinned
+
+
+class ReplicaRouter:
+    """
+    Sends the reads of read only requests (GET, HEAD, OPTIONS) for the
+    catalog and user apps to one of the REPLICA_DATABASES, and everything
+    else to the primary. Reads go to the primary as well inside a
+    transaction on it, outside a request (management commands), and for
+    REPLICA_PIN_SECONDS after the same user wrote anything or anyone wrote
+    to the app, so a client always reads its own writes.
+
+    Needs replicas.middleware.ReplicaMiddleware to see the requests.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = current.get()
+        replicas = replica_databases()
+        if state is None or not state.read_only or not replicas:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label not in replica_apps():
+            return DEFAULT_DB_ALIAS
+        # A replica can't see the rows written by an open transaction
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.pinned(model._meta.app_label):
+            return DEFAULT_DB_ALIAS
+        # Stay on one replica for the whole request so its reads are consistent
+        if state.replica is None:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current.get()
+        if state is None:
+            if replica_databases() and model._meta.app_label in replica_apps():
+                pin_apps([model._meta.app_label])
+        else:
+            state.written.add(model._meta.app_label)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data
+        databases = {DEFAULT_DB_ALIAS, *replica_databases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
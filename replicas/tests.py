@@ -0,0 +1,88 @@
+from io import StringIO
+from unittest import skipUnless
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from books.models import Author, Book
+from checkouts.models import CheckoutSettings
+from checkouts.config import clear_checkout_settings
+
+
+# Run with a second SQLite database standing in for the replica, e.g.
+# DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'replica.sqlite3'}
+@skipUnless('replica' in settings.DATABASES, 'Needs a "replica" database alias')
+@override_settings(
+    REPLICA_DATABASES=['replica'],
+    DATABASE_ROUTERS=['replicas.routers.ReplicaRouter'],
+    MIDDLEWARE=[
+        'replicas.middleware.ReplicaMiddleware',
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.middleware.common.CommonMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    ],
+)
+class ReplicaRouterTest(TransactionTestCase):
+    # The runner sets up the databases of skipped classes too, so only ask for the alias when it exists
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def setUp(self):
+        clear_checkout_settings()
+        Book.objects.create(title='Primary Book', author=Author.objects.create(name='Author Name'))
+        self.admin = User.objects.create_user(username='admin', password='password', is_staff=True, is_superuser=True)
+        self.other_admin = User.objects.create_user(username='other_admin', password='password', is_staff=True, is_superuser=True)
+        User.objects.create_user(username='reader', password='password')
+        self.settings = CheckoutSettings.objects.create(notice='Primary notice')
+        # The replica has fallen behind and only holds its own rows
+        Book.objects.using('replica').bulk_create([Book(title='Replica Book')])
+        User.objects.using('replica').bulk_create([
+            User(username='replica_staff', is_staff=True), User(username='replica_reader'),
+        ])
+        # Forget the pins left by the writes above
+        cache.clear()
+
+    def get(self, user, url):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client.get(url)
+
+    def usernames(self, user, url):
+        return [row['username'] for row in self.get(user, url).data]
+
+    def test_catalog_reads_from_the_replica(self):
+        response = self.get(None, '/api/books/book-view/')
+        self.assertEqual([book['title'] for book in response.json()], ['Replica Book'])
+
+    def test_circulation_stays_on_the_primary(self):
+        response = self.get(self.admin, '/api/checkouts/checkout-notice/')
+        self.assertEqual(response.data, {'notice': 'Primary notice'})
+
+    def test_writer_reads_its_own_writes(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.patch(f'/api/checkouts/update-checkout-settings/{self.settings.pk}/', {'notice': 'New'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.usernames(self.admin, '/api/users/list-staff-users/'), ['admin', 'other_admin'])
+        self.assertEqual(self.usernames(self.other_admin, '/api/users/list-staff-users/'), ['replica_staff'])
+
+    def test_written_apps_are_read_from_the_primary(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.delete('/api/users/remove-normal-user/reader/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(self.usernames(self.other_admin, '/api/users/list-normal-users/'), [])
+        # Once the pin expires the replica is trusted again
+        cache.clear()
+        self.assertEqual(self.usernames(self.other_admin, '/api/users/list-normal-users/'), ['replica_reader'])
+
+    def test_sync_replicas(self):
+        call_command('sync_replicas', stdout=StringIO())
+        self.assertEqual(list(Book.objects.using('replica').values_list('title', flat=True)), ['Primary Book'])
+        self.assertEqual(self.get(None, '/api/books/book-view/').json()[0]['title'], 'Primary Book')
@@ -0,0 +1,71 @@
+from datetime import datetime
+from books.inventory import return_copy, adjust_copies
+from .models import Reservation
+
+
+def next_in_line(book):
+    # Oldest waiting reservation, read from the head of the (book, created) index
+    return (
+        Reservation.objects.filter(book=book, status=Reservation.WAITING)
+        .order_by('created', 'id')
+        .values_list('id', flat=True)
+        .first()
+    )
+
+
+def allocate_copy(book):
+    """
+    Hand a returned copy to the patron at the head of the book's queue.
+    Claiming is a conditional UPDATE, so when two returns race for the same
+    reservation only one wins and the other moves on to the next patron.
+    Returns the id of the reservation now ready for pickup, or None.
+    """
+    while True:
+        reservation_id = next_in_line(book)
+        if reservation_id is None:
+            return None
+        claimed = Reservation.objects.filter(pk=reservation_id, status=Reservation.WAITING).update(
+            status=Reservation.READY, ready_datetime=datetime.now(),
+        )
+        if claimed:
+            return reservation_id
+
+
+def hand_back_copy(book):
+    # A returned copy goes to the next patron in line, or back on the shelf
+    reservation_id = allocate_copy(book)
+    if reservation_id is None:
+        return_copy(book)
+    return reservation_id
+
+
+def fulfil_reservation(user, book):
+    # A copy held for this user (or user id) is checked out instead of one from the shelf
+    return bool(
+        Reservation.objects.filter(user=user, book=book, status=Reservation.READY)
+        .update(status=Reservation.FULFILLED)
+    )
+
+
+def hand_back_copies(returned):
+    """
+    Set-based hand_back_copy for {book id: copies returned}: the head of
+    each book's queue is read in one query and claimed in one UPDATE, and
+    the copies nobody is waiting for go back on the shelf in one more.
+    Runs inside the caller's transaction, with the queue rows locked.
+    """
+    waiting = (
+        Reservation.objects.select_for_update()
+        .filter(book_id__in=returned, status=Reservation.WAITING)
+        .order_by('book_id', 'created', 'id')
+        .values_list('id', 'book_id')
+    )
+    claimed, shelved = [], dict(returned)
+    for reservation_id, book_id in waiting:
+        if shelved[book_id]:
+            claimed.append(reservation_id)
+            shelved[book_id] -= 1
+    if claimed:
+        Reservation.objects.filter(pk__in=claimed).update(status=Reservation.READY, ready_datetime=datetime.now())
+    adjust_copies(shelved)
+    return claimed
@@ -0,0 +1,31 @@
+from django.db import models
+from django.contrib.auth.models import User
+from books.models import Book
+
+# Create your models here.
+class Reservation(models.Model):
+    WAITING = 'waiting'
+    READY = 'ready'
+    FULFILLED = 'fulfilled'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (WAITING, 'Waiting'),
+        (READY, 'Ready for pickup'),
+        (FULFILLED, 'Fulfilled'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reservations')
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, related_name='reservations')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=WAITING)
+    created = models.DateTimeField(auto_now_add=True)
+    ready_datetime = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Head of each book's hold queue, found with one index seek however long the queue is
+            models.Index(fields=['book', 'created', 'id'], condition=models.Q(status='waiting'), name='reservation_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Reservation - {self.id}"
@@ -0,0 +1,31 @@
+from rest_framework import serializers
+from books.models import Book
+from .models import Reservation
+
+
+class ReservationSerializer(serializers.ModelSerializer):
+    book = serializers.CharField(source='book.title', read_only=True)
+
+    class Meta:
+        model = Reservation
+        fields = ['id', 'book', 'status', 'created', 'ready_datetime']
+        read_only_fields = ['id', 'status', 'created', 'ready_datetime']
+
+
+class ReserveBookSerializer(serializers.Serializer):
+    book = serializers.CharField(max_length=255)
+
+    def validate_book(self, value):
+        book = Book.objects.by_title(value).first()
+        if book is None:
+            raise serializers.ValidationError("The library does not have this book.")
+        if book.available_copies > 0:
+            raise serializers.ValidationError("The book is available, check it out instead.")
+        return book
+
+    def create(self, validated_data):
+        user = self.context['request'].user
+        book = validated_data['book']
+        if Reservation.objects.filter(user=user, book=book, status__in=[Reservation.WAITING, Reservation.READY]).exists():
+            raise serializers.ValidationError("You have already reserved this book.")
+        return Reservation.objects.create(user=user, book=book)
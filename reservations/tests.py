@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime
+from django.contrib.auth.models import User
+from django.db import connection, OperationalError
+from django.test import TestCase, TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from books.models import Book
+from checkouts.config import clear_checkout_settings
+from checkouts.models import Checkout, CheckoutSettings
+from .allocation import allocate_copy
+from .models import Reservation
+
+
+class ReservationQueueTest(TestCase):
+    def setUp(self):
+        clear_checkout_settings()
+        CheckoutSettings.objects.create()
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.borrower = User.objects.create_user(username='borrower', password='password')
+        self.first = User.objects.create_user(username='first', password='password')
+        self.second = User.objects.create_user(username='second', password='password')
+        self.book = Book.objects.create(title='Popular Book', quantity=1)
+        Book.objects.filter(pk=self.book.pk).update(available_copies=0)
+        Checkout.objects.create(user=self.borrower, book=self.book, due_datetime=datetime.now())
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def reserve(self, user):
+        return self.client_for(user).post('http://127.0.0.1:8000/api/reservations/reserve/', {'book': 'popular book'}, format='json')
+
+    def test_returned_copy_goes_to_first_in_line(self):
+        self.assertEqual(self.reserve(self.first).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.reserve(self.second).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.reserve(self.first).status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client_for(self.staff).post('http://127.0.0.1:8000/api/checkouts/return-book/', {'username': 'borrower', 'book': 'Popular Book'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # The copy is held for the first patron instead of going back on the shelf
+        self.assertEqual(Book.objects.get(pk=self.book.pk).available_copies, 0)
+        statuses = dict(Reservation.objects.values_list('user__username', 'status'))
+        self.assertEqual(statuses, {'first': Reservation.READY, 'second': Reservation.WAITING})
+
+        # Only the patron it is held for can check it out
+        response = self.client_for(self.second).post('http://127.0.0.1:8000/api/checkouts/checkout/', {'book': 'Popular Book'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client_for(self.first).post('http://127.0.0.1:8000/api/checkouts/checkout/', {'book': 'Popular Book'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Reservation.objects.get(user=self.first).status, Reservation.FULFILLED)
+
+    def test_cancelling_a_held_copy_passes_it_on(self):
+        self.reserve(self.first)
+        self.reserve(self.second)
+        allocate_copy(self.book)
+        reservation = Reservation.objects.get(user=self.first)
+        response = self.client_for(self.first).post(f'http://127.0.0.1:8000/api/reservations/cancel/{reservation.pk}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Reservation.objects.get(user=self.second).status, Reservation.READY)
+
+    def test_available_book_cannot_be_reserved(self):
+        Book.objects.filter(pk=self.book.pk).update(available_copies=1)
+        self.assertEqual(self.reserve(self.first).status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AllocationConcurrencyTest(TransactionTestCase):
+    patrons = 20
+    returns = 8
+
+    def setUp(self):
+        self.book = Book.objects.create(title='Popular Book', quantity=0)
+        users = User.objects.bulk_create([User(username=f'patron{i}') for i in range(self.patrons)])
+        for user in users:
+            Reservation.objects.create(user=user, book=self.book)
+
+    def allocate(self, start, results):
+        start.wait()
+        try:
+            while True:
+                try:
+                    results.append(allocate_copy(self.book))
+                    return
+                except OperationalError:
+                    # SQLite allows one writer at a time, retry when the table is locked
+                    continue
+        finally:
+            connection.close()
+
+    def test_each_copy_goes_to_a_different_patron_in_order(self):
+        start = threading.Barrier(self.returns)
+        results = []
+        threads = [threading.Thread(target=self.allocate, args=(start, results)) for _ in range(self.returns)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(set(results)), self.returns)
+        expected = list(Reservation.objects.order_by('created', 'id').values_list('id', flat=True)[:self.returns])
+        self.assertEqual(sorted(results), sorted(expected))
+        self.assertEqual(Reservation.objects.filter(status=Reservation.READY).count(), self.returns)
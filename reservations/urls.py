@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import ReserveBookAPIView, MyReservationsAPIView, CancelReservationAPIView
+
+
+urlpatterns = [
+    path('reserve/', ReserveBookAPIView.as_view(), name='reserve-book'),
+    path('my-reservations/', MyReservationsAPIView.as_view(), name='my-reservations'),
+    path('cancel/<int:pk>/', CancelReservationAPIView.as_view(), name='cancel-reservation'),
+]
@@ -0,0 +1,51 @@
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import IsAuthenticated
+from .models import Reservation
+from .allocation import hand_back_copy
+from .serializers import ReservationSerializer, ReserveBookSerializer
+
+# Create your views here.
+
+class ReserveBookAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = ReserveBookSerializer(data=request.data, context={'request': request})
+        if serializer.is_valid():
+            reservation = serializer.save()
+            return Response(ReservationSerializer(reservation).data, status=status.HTTP_201_CREATED)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class MyReservationsAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        reservations = (
+            Reservation.objects.filter(user=request.user, status__in=[Reservation.WAITING, Reservation.READY])
+            .select_related('book')
+            .order_by('created')
+        )
+        serializer = ReservationSerializer(reservations, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class CancelReservationAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        # Only the patron's own, not yet fulfilled reservation can be cancelled
+        reservation = Reservation.objects.filter(pk=pk, user=request.user, status__in=[Reservation.WAITING, Reservation.READY]).first()
+        if reservation is None:
+            return Response({"error": "Reservation not found."}, status=status.HTTP_404_NOT_FOUND)
+        with transaction.atomic():
+            cancelled = Reservation.objects.filter(pk=pk, status=reservation.status).update(status=Reservation.CANCELLED)
+            if cancelled and reservation.status == Reservation.READY:
+                # The copy held for this patron goes to the next one in line
+                hand_back_copy(reservation.book)
+        if not cancelled:
+            return Response({"error": "Reservation not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Reservation cancelled."}, status=status.HTTP_200_OK)
@@ -0,0 +1,51 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+
+ACCOUNT_KEY = 'user_account_{}'
+# Staff checks trust a cached copy of the account for this long at most
+ACCOUNT_TIMEOUT = 30
+NO_ACCOUNT = {'is_active': False, 'is_staff': False, 'is_superuser': False}
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Builds request.user from the claims login puts in the access token
+    instead of loading the User row on every request. The account is
+    still checked to exist and be active, through the cached account
+    status. Tokens issued without those claims load the user from the
+    database.
+    """
+
+    def get_user(self, validated_token):
+        if 'username' not in validated_token:
+            return super().get_user(validated_token)
+        user = TokenUser(validated_token)
+        # Same failures as JWTAuthentication, a deleted account has no status and reads as inactive
+        if not account_status(user.id)['is_active']:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+
+def account_status(user_id):
+    # Current flags of the account, from the cache or one small query
+    key = ACCOUNT_KEY.format(user_id)
+    status = cache.get(key)
+    if status is None:
+        status = User.objects.filter(pk=user_id).values('is_active', 'is_staff', 'is_superuser').first() or NO_ACCOUNT
+        cache.set(key, status, ACCOUNT_TIMEOUT)
+    return status
+
+
+def current_status(user):
+    # Claims may be stale, so users built from a token are checked against the account
+    if isinstance(user, TokenUser):
+        return account_status(user.id)
+    return {'is_active': user.is_active, 'is_staff': user.is_staff, 'is_superuser': user.is_superuser}
+
+
+def clear_account_status(user_id):
+    cache.delete(ACCOUNT_KEY.format(user_id))
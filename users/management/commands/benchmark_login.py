@@ -0,0 +1,65 @@
+import time
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from users.serializers import UserLoginSerializer
+from users.tokens import refresh_token_for
+from users.views import UserLoginAPIView
+
+PASSWORD = 'benchmark-password'
+
+
+def login_twice(data):
+    # The login view before: the serializer and then the view both authenticated
+    serializer = UserLoginSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    user = authenticate(username=data['username'], password=data['password'])
+    return refresh_token_for(user)
+
+
+def login_once(data):
+    serializer = UserLoginSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return refresh_token_for(serializer.validated_data['user'])
+
+
+class Command(BaseCommand):
+    help = 'Compare logins per second before and after verifying credentials once, and time a credential stuffing burst'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument('--burst', type=int, default=200)
+
+    def handle(self, *args, **options):
+        # The benchmark user is rolled back once timed
+        with transaction.atomic():
+            User.objects.create_user(username='benchmark_login', password=PASSWORD)
+            self.run(options['logins'], options['burst'])
+            transaction.set_rollback(True)
+
+    def run(self, logins, burst):
+        data = {'username': 'benchmark_login', 'password': PASSWORD}
+        for label, login in (('authenticate twice', login_twice), ('authenticate once', login_once)):
+            start = time.perf_counter()
+            for _ in range(logins):
+                login(data)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f'{label}: {logins / elapsed:.1f} logins/s')
+
+        # A burst of wrong passwords from one client against the rate limited view
+        cache.clear()
+        view = UserLoginAPIView.as_view()
+        factory = RequestFactory()
+        statuses = {}
+        start = time.perf_counter()
+        for i in range(burst):
+            request = factory.post('/api/users/login/', {'username': f'victim{i}', 'password': 'guess'}, content_type='application/json')
+            response = view(request)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{burst} wrong passwords from one IP in {elapsed:.2f} s: '
+                          f'{statuses.get(400, 0)} checked, {statuses.get(429, 0)} throttled')
+        cache.clear()
@@ -1,4 +1,7 @@
+from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
 # Create your models here.
 class UserProfile(models.Model):
@@ -8,4 +11,11 @@ class UserProfile(models.Model):
     email = models.EmailField(blank=False, unique=True)
     password = models.CharField(max_length=255)
     is_staff = models.BooleanField(default=False)
-    is_librarian = models.BooleanField(default=False)
\ No newline at end of file
+    is_librarian = models.BooleanField(default=False)
+
+
+# Drop the cached account flags whenever a user is changed or deleted
+@receiver([post_save, post_delete], sender=User)
+def clear_account_status_cache(sender, instance, **kwargs):
+    from .authentication import clear_account_status
+    clear_account_status(instance.pk)
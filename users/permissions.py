@@ -0,0 +1,20 @@
+from rest_framework import permissions
+from .authentication import current_status
+
+
+class IsAdminOrStaffUser(permissions.BasePermission):
+    def has_permission(self, request, view):
+        user = request.user
+        # Reject from the claims alone, then make sure staff rights were not revoked since login
+        if not (user.is_superuser or user.is_staff):
+            return False
+        status = current_status(user)
+        return status['is_active'] and (status['is_superuser'] or status['is_staff'])
+
+
+class IsAdminUser(permissions.IsAdminUser):
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+        status = current_status(request.user)
+        return status['is_active'] and status['is_staff']
@@ -44,7 +44,8 @@ class UserLoginSerializer(serializers.Serializer):
         else:
             raise serializers.ValidationError('Must include "username" and "password".')
 
-        # Add user ID to the data dictionary
+        # Add the user and its ID to the data dictionary, so the view does not authenticate again
+        data['user'] = user
         data['user_id'] = user.id
 
         return data
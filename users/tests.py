@@ -1,3 +1,124 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from books.models import Book
+from checkouts.config import clear_checkout_settings
+from checkouts.models import CheckoutSettings
 
 # Create your tests here.
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ClaimsAuthenticationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader', password='password')
+        self.staff = User.objects.create_user(username='staff', password='password', is_staff=True)
+        self.client = APIClient()
+
+    def login(self, username):
+        response = self.client.post('/api/users/login/', {'username': username, 'password': 'password'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['access_token']
+
+    def test_login_token_carries_claims(self):
+        token = AccessToken(self.login('staff'))
+        self.assertEqual(token['user_id'], self.staff.id)
+        self.assertEqual(token['username'], 'staff')
+        self.assertTrue(token['is_staff'])
+        self.assertFalse(token['is_superuser'])
+
+    def test_user_is_read_from_claims(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login("reader")}')
+        # The first request caches the account status, later ones need no query
+        self.client.get('/api/users/get-username/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/users/get-username/')
+        self.assertEqual(response.data, {'username': 'reader', 'user_id': self.reader.id})
+
+    def test_inactive_and_deleted_accounts_are_rejected(self):
+        clear_checkout_settings()
+        CheckoutSettings.objects.create()
+        Book.objects.create(title='Book Title')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login("reader")}')
+        self.reader.is_active = False
+        self.reader.save()
+        response = self.client.post('/api/checkouts/checkout/', {'book': 'Book Title'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.credentials()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login("staff")}')
+        self.staff.delete()
+        response = self.client.post('/api/checkouts/checkout/', {'book': 'Book Title'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_token_without_claims_loads_the_user(self):
+        token = RefreshToken.for_user(self.reader).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get('/api/users/get-username/')
+        self.assertEqual(response.data['username'], 'reader')
+
+    def test_staff_checks_are_cached_and_revocable(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login("staff")}')
+        url = '/api/books/catalog-cache-stats/'
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        # The token still says staff, but the account no longer is
+        self.staff.is_staff = False
+        self.staff.save()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_reader_claims_are_rejected_without_a_query(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login("reader")}')
+        self.client.get('/api/users/get-username/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/books/catalog-cache-stats/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+                   LOGIN_RATE_LIMITS={'ip': (3, 60), 'username': (2, 60)})
+class LoginRateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='reader', password='password')
+        self.client = APIClient()
+
+    def login(self, username, password='password', ip='10.0.0.1'):
+        return self.client.post('/api/users/login/', {'username': username, 'password': password},
+                                format='json', REMOTE_ADDR=ip)
+
+    def test_login_hashes_the_password_once(self):
+        with mock.patch('users.serializers.authenticate', wraps=authenticate) as serializer_auth, \
+             mock.patch('users.views.authenticate', wraps=authenticate) as view_auth:
+            self.assertEqual(self.login('reader').status_code, status.HTTP_200_OK)
+        self.assertEqual(serializer_auth.call_count + view_auth.call_count, 1)
+
+    def test_username_bucket(self):
+        self.assertEqual(self.login('reader', 'wrong').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login('reader', 'wrong', ip='10.0.0.2').status_code, status.HTTP_400_BAD_REQUEST)
+        # Out of tokens for this username, even with the right password from another address
+        response = self.login('Reader', ip='10.0.0.3')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_ip_bucket(self):
+        for i in range(3):
+            self.assertEqual(self.login(f'victim{i}', 'guess').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.login('reader').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login('reader', ip='10.0.0.2').status_code, status.HTTP_200_OK)
+
+    def test_bucket_refills(self):
+        with mock.patch('users.throttling.time.time', return_value=1000):
+            for i in range(3):
+                self.login(f'victim{i}', 'guess')
+            self.assertEqual(self.login('reader').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # One token per second comes back at 60 a minute
+        with mock.patch('users.throttling.time.time', return_value=1001.5):
+            self.assertEqual(self.login('reader').status_code, status.HTTP_200_OK)
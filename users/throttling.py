@@ -0,0 +1,52 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+# (burst, tokens added per minute) of the login buckets, per client IP and
+# per username. Override with the LOGIN_RATE_LIMITS setting, None turns
+# the limiter off.
+LOGIN_RATE_LIMITS = {'ip': (20, 30), 'username': (5, 10)}
+BUCKET_KEY = 'login_bucket_{}_{}'
+
+
+class TokenBucket:
+    """
+    A token bucket kept in the cache as (tokens, updated). Concurrent
+    requests may both spend the same token, which only ever lets a burst
+    through slightly larger than the capacity.
+    """
+
+    def __init__(self, scope, ident, capacity, per_minute):
+        self.key = BUCKET_KEY.format(scope, hashlib.md5(ident.encode()).hexdigest())
+        self.capacity = capacity
+        self.rate = per_minute / 60
+        self.wait = 0
+
+    def take(self, now):
+        tokens, updated = cache.get(self.key, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.wait = (1 - tokens) / self.rate
+            return False
+        # A bucket left alone until it is full again is the same as no bucket
+        cache.set(self.key, (tokens - 1, now), int(self.capacity / self.rate) + 1)
+        return True
+
+
+class LoginRateThrottle(BaseThrottle):
+    def allow_request(self, request, view):
+        limits = getattr(settings, 'LOGIN_RATE_LIMITS', LOGIN_RATE_LIMITS)
+        if not limits:
+            return True
+        now = time.time()
+        buckets = [TokenBucket('ip', self.get_ident(request), *limits['ip'])]
+        username = str(request.data.get('username') or '').lower()
+        if username:
+            buckets.append(TokenBucket('username', username, *limits['username']))
+        self.waits = [bucket.wait for bucket in buckets if not bucket.take(now)]
+        return not self.waits
+
+    def wait(self):
+        return max(self.waits)
@@ -0,0 +1,10 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def refresh_token_for(user):
+    refresh = RefreshToken.for_user(user)
+    # Claims ClaimsJWTAuthentication builds request.user from, the access token inherits them
+    refresh['username'] = user.username
+    refresh['is_staff'] = user.is_staff
+    refresh['is_superuser'] = user.is_superuser
+    return refresh
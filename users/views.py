@@ -6,9 +6,13 @@ from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from .serializers import UserSerializer, UserRegistrationSerializer, UserLoginSerializer, StaffUserSerializer, NormalUserSerializer
 from django.contrib.auth import authenticate
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser, BasePermission
+from rest_framework.permissions import IsAuthenticated, AllowAny
 #from django.contrib.auth import authenticate
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import ClaimsJWTAuthentication
+from .permissions import IsAdminOrStaffUser, IsAdminUser
+from .tokens import refresh_token_for
+from .throttling import LoginRateThrottle
 
 
 class UserRegistrationAPIView(APIView):
@@ -27,14 +31,14 @@ class UserRegistrationAPIView(APIView):
 
 class UserLoginAPIView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle]  # Bursts are turned away before any password is hashed
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
-            username = serializer.validated_data['username']
-            password = serializer.validated_data['password']
-            user = authenticate(username=username, password=password)
+            # The serializer already checked the password, hashing it once per login
+            user = serializer.validated_data['user']
             if user is not None:
-                refresh = RefreshToken.for_user(user)
+                refresh = refresh_token_for(user)
                 access_token = refresh.access_token
                 access_token['user_id'] = user.id
                 return Response({
@@ -49,6 +53,7 @@ class UserLoginAPIView(APIView):
 
 
 class UserLogoutAPIView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -69,7 +74,7 @@ class UserLogoutAPIView(APIView):
         
 
 class GetUsernameFromTokenAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]  # Reads the user from the token claims, no query
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -128,11 +133,6 @@ class StaffCountAPIView(APIView):
         return Response({"staff_count": staff_count}, status=status.HTTP_200_OK)
 
 
-class IsAdminOrStaffUser(BasePermission):
-    def has_permission(self, request, view):
-        return request.user.is_superuser or request.user.is_staff
-    
-    
 class RemoveNormalUserAPIView(APIView):
     permission_classes = [IsAdminOrStaffUser]
 